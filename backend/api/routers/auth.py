@@ -10,6 +10,7 @@ Endpoints:
 - POST /auth/logout-all - Logout from all devices
 """
 
+import asyncio
 from datetime import datetime
 
 import structlog
@@ -135,8 +136,12 @@ async def register(request: Request, body: UserRegister, db: AsyncSession = Depe
         raise AlreadyExistsError("User", "email", body.email)
 
     # Create new user
-    user = User(email=body.email, hashed_password=hash_password(body.password), full_name=body.full_name)
+    # bcrypt is CPU-bound: hash in a worker thread to keep the event loop responsive
+    hashed_password = await asyncio.to_thread(hash_password, body.password)
+    user = User(email=body.email, hashed_password=hashed_password, full_name=body.full_name)
     user = await user_repo.create(user)
+    # Commit before responding: get_db only finalizes after the response is sent
+    await user_repo.commit()
 
     logger.info("user_registered", user_id=user.id, email=user.email)
 
@@ -156,14 +161,16 @@ async def login(request: Request, body: UserLogin, db: AsyncSession = Depends(ge
     # Find user by email
     user = await user_repo.get_by_email(body.email)
 
+    # bcrypt is slow on purpose: check once, off the event loop
+    pwd_valid = user is not None and await asyncio.to_thread(verify_password, body.password, user.hashed_password)
+
     # DEBUG
     logger.info("login_attempt", email=body.email, user_found=user is not None)
     if user:
-        pwd_valid = verify_password(body.password, user.hashed_password)
         logger.info("password_check", valid=pwd_valid, hash_prefix=user.hashed_password[:20])
 
     # Verify user exists and password is correct
-    if not user or not verify_password(body.password, user.hashed_password):
+    if not pwd_valid:
         raise AuthenticationError("Invalid email or password")
 
     if not user.is_active:
@@ -182,6 +189,7 @@ async def login(request: Request, body: UserLogin, db: AsyncSession = Depends(ge
         ip_address=request.client.host if request.client else None,
     )
     await token_repo.create(db_refresh_token)
+    await token_repo.commit()
 
     logger.info("user_logged_in", user_id=user.id, email=user.email)
 
@@ -260,6 +268,7 @@ async def logout(
     if db_token:
         db_token.is_revoked = True
         await token_repo.save(db_token)
+        await token_repo.commit()
         logger.info("user_logged_out", user_id=current_user.id)
 
     return {"message": "Successfully logged out"}
@@ -273,6 +282,7 @@ async def logout_all_devices(
     token_repo = RefreshTokenRepository(db)
 
     await token_repo.revoke_all_user_tokens(current_user.id)
+    await token_repo.commit()
 
     logger.info("user_logged_out_all_devices", user_id=current_user.id)
 
@@ -296,6 +306,7 @@ async def update_profile(
         current_user.full_name = body.full_name
 
     await user_repo.save(current_user)
+    await user_repo.commit()
 
     logger.info("user_profile_updated", user_id=current_user.id)
 
@@ -310,7 +321,7 @@ async def change_password(
     user_repo = UserRepository(db)
 
     # Verify current password
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await asyncio.to_thread(verify_password, body.current_password, current_user.hashed_password):
         raise AuthenticationError("Current password is incorrect")
 
     # Validate new password strength
@@ -319,8 +330,9 @@ async def change_password(
         raise ValidationError(error_message)
 
     # Update password
-    current_user.hashed_password = hash_password(body.new_password)
+    current_user.hashed_password = await asyncio.to_thread(hash_password, body.new_password)
     await user_repo.save(current_user)
+    await user_repo.commit()
 
     logger.info("user_password_changed", user_id=current_user.id)
 
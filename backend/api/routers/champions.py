@@ -14,6 +14,7 @@ from pathlib import Path
 
 import structlog
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -27,6 +28,9 @@ logger = structlog.get_logger()
 
 router = APIRouter(tags=["Champions"])
 
+# Validates a whole page of ORM champions in one call
+_champion_list_adapter = TypeAdapter(list[ChampionListResponse])
+
 
 # ============================================
 # Video Validation
@@ -273,7 +277,7 @@ async def list_champions(
     result = await db.execute(query)
     champions = result.scalars().all()
 
-    return [ChampionListResponse.model_validate(c) for c in champions]
+    return _champion_list_adapter.validate_python(champions, from_attributes=True)
 
 
 @router.get("/champions/{champion_id}", response_model=ChampionResponse)
@@ -14,6 +14,7 @@ from datetime import datetime
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -39,6 +40,9 @@ logger = structlog.get_logger()
 
 router = APIRouter(tags=["Training"])
 
+# Validates a whole page of ORM sessions in one call
+_session_list_adapter = TypeAdapter(list[SessionResponse])
+
 # Initialize agents
 pattern_extractor = PatternAgent()
 training_bot = TrainingAgent()
@@ -379,7 +383,7 @@ async def list_sessions(
     result = await db.execute(query)
     sessions = result.scalars().all()
 
-    return [SessionResponse.model_validate(s) for s in sessions]
+    return _session_list_adapter.validate_python(sessions, from_attributes=True)
 
 
 @router.get("/training/sessions/{session_id}", response_model=SessionResponse)
@@ -35,6 +35,7 @@ class Settings(BaseSettings):
     # Security (OWASP compliant)
     # ===========================================
     PASSWORD_MIN_LENGTH: int = 12  # OWASP recommends 12-14 for high security
+    BCRYPT_ROUNDS: int = 12  # bcrypt work factor, each +1 doubles hashing time
 
     # ===========================================
     # File Upload
@@ -124,7 +124,9 @@ from domain.exceptions import (
     SessionNotFoundError,
     ValidationError,
 )
+from orchestrator.decision_engine import close_client
 from schemas import ErrorResponse
+from services.activity import activity_buffer
 
 # ============================================
 # Application Lifespan
@@ -146,6 +148,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("application_shutting_down")
+    await activity_buffer.close()
+    await close_client()
     await close_db()
 
 
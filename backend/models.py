@@ -6,7 +6,7 @@ from datetime import datetime
 from enum import Enum as PyEnum
 from typing import Optional
 
-from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -313,6 +313,10 @@ class ActivityLog(Base):
     """
 
     __tablename__ = "activity_logs"
+    __table_args__ = (
+        # Covers the period stats (by action, per day, distinct users) without touching the table
+        Index("ix_activity_logs_created_at_action_user", "created_at", "action", "user_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
@@ -364,6 +368,10 @@ class ErrorLog(Base):
     """
 
     __tablename__ = "error_logs"
+    __table_args__ = (
+        # Covers get_error_stats' grouped count over a date range
+        Index("ix_error_logs_created_at_type_resolved", "created_at", "error_type", "is_resolved"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int | None] = mapped_column(
@@ -613,15 +621,20 @@ class AdminAuditLog(Base):
     """
 
     __tablename__ = "admin_audit_logs"
+    __table_args__ = (
+        # One per get_logs filter, each serving the created_at DESC ordering
+        Index("ix_admin_audit_logs_admin_id_created_at", "admin_id", "created_at"),
+        Index("ix_admin_audit_logs_action_created_at", "action", "created_at"),
+        Index("ix_admin_audit_logs_resource_type_created_at", "resource_type", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     admin_id: Mapped[int] = mapped_column(
         Integer,
         ForeignKey("users.id", ondelete="SET NULL"),
         nullable=True,  # Nullable in case admin is deleted
-        index=True,
     )
-    action: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    action: Mapped[str] = mapped_column(String(50), nullable=False)
     resource_type: Mapped[str] = mapped_column(String(50), nullable=False)  # user, webhook, email_template, etc.
     resource_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     old_value: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # Previous state
@@ -4,16 +4,51 @@ Decision Engine - Intelligent routing and workflow planning.
 Uses Claude Opus to analyze tasks and create execution plans.
 """
 
-import json
+import asyncio
+import hashlib
 import os
+import re
 from dataclasses import dataclass, field
 from enum import Enum
 
+import httpx
+import orjson
 import structlog
-from anthropic import AsyncAnthropic
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 
 logger = structlog.get_logger()
 
+# Markdown code fence around a JSON body (```json ... ```), any case, trailing text ignored;
+# the closing fence is optional so truncated responses still parse
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*(?:```|\Z)", re.IGNORECASE | re.DOTALL)
+
+# Shared client so every DecisionEngine reuses the same keep-alive pool.
+# ANTHROPIC_API_KEY is read when it is created; close_client() drops it so a
+# rotated key is picked up on next use.
+_client: AsyncAnthropic | None = None
+
+
+def _get_client() -> AsyncAnthropic:
+    """Get or create the shared Anthropic client."""
+    global _client
+    if _client is None:
+        _client = AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Close the shared Anthropic client.
+    Called on application shutdown; the next use creates a fresh one.
+    """
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
+
 
 class AgentType(Enum):
     """Available agent types."""
@@ -34,6 +69,15 @@ class WorkflowStep:
     timeout_seconds: int = 300
     retry_count: int = 0
     max_retries: int = 2
+    resolved_deps: list[int] = field(default_factory=list, init=False)  # depends_on as step indices
+
+    def __post_init__(self):
+        # Parse dependencies once (e.g., "step_0" -> 0) so scheduling only compares ints
+        for dep in self.depends_on:
+            try:
+                self.resolved_deps.append(int(dep.removeprefix("step_")))
+            except ValueError:
+                continue
 
 
 @dataclass
@@ -117,9 +161,24 @@ Analyse et retourne un JSON avec:
 
 JSON uniquement, pas de markdown."""
 
+    # Delay between Message Batches status polls
+    BATCH_POLL_INTERVAL_SECONDS = 5
+    # Batches may take up to 24h; past this the batch is cancelled and tasks fall back
+    BATCH_MAX_WAIT_SECONDS = 600
+
+    # Fallback routing keywords, checked in order (first matching agent wins)
+    FALLBACK_KEYWORDS: list[tuple[AgentType, re.Pattern]] = [
+        (AgentType.AUDIO, re.compile("vidéo|video|audio|upload|transcri")),
+        (AgentType.PATTERN, re.compile("pattern|analyse|extract|technique")),
+    ]
+
     def __init__(self, model: str = "claude-opus-4-20250514"):
         self.model = model
-        self.client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+    @property
+    def client(self) -> AsyncAnthropic:
+        """The shared client, looked up on each use so close_client() takes effect."""
+        return _get_client()
 
     async def analyze(self, task: str, context: dict | None = None) -> Workflow:
         """
@@ -134,25 +193,100 @@ JSON uniquement, pas de markdown."""
         """
         logger.info("decision_engine_analyzing", task=task[:100])
 
-        context_str = json.dumps(context, ensure_ascii=False) if context else "None"
+        try:
+            response_text = await self._stream_response(self._build_prompt(task, context))
+        except Exception as e:
+            logger.error("decision_engine_error", error=str(e))
+            return self._create_fallback_workflow(task)
+
+        return self._parse_workflow(task, response_text)
+
+    async def abatch(self, tasks: list[tuple[str, dict | None]]) -> list[Workflow]:
+        """
+        Analyze several tasks with a single Message Batches request.
+
+        Batched requests are billed at a discount and do not count against the
+        per-minute rate limits, at the cost of asynchronous completion.
+
+        Args:
+            tasks: List of (task, context) pairs
 
+        Returns:
+            One Workflow per task, in input order (fallback workflows on failure)
+        """
+        if not tasks:
+            return []
+
+        logger.info("decision_engine_batch_submitting", count=len(tasks))
+
+        responses: dict[str, str] = {}
         try:
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=2048,
-                messages=[{"role": "user", "content": self.ROUTING_PROMPT.format(task=task, context=context_str)}],
-            )
+            requests = [
+                {
+                    "custom_id": f"task_{i}",
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": 2048,
+                        "messages": [{"role": "user", "content": self._build_prompt(task, context)}],
+                    },
+                }
+                for i, (task, context) in enumerate(tasks)
+            ]
+
+            batch = await self.client.messages.batches.create(requests=requests)
+            try:
+                async with asyncio.timeout(self.BATCH_MAX_WAIT_SECONDS):
+                    while batch.processing_status != "ended":
+                        await asyncio.sleep(self.BATCH_POLL_INTERVAL_SECONDS)
+                        batch = await self.client.messages.batches.retrieve(batch.id)
+            except TimeoutError:
+                logger.warning("decision_engine_batch_timeout", batch_id=batch.id, count=len(tasks))
+                await self.client.messages.batches.cancel(batch.id)
+            else:
+                async for entry in await self.client.messages.batches.results(batch.id):
+                    if entry.result.type == "succeeded":
+                        responses[entry.custom_id] = entry.result.message.content[0].text.strip()
+                    else:
+                        logger.warning(
+                            "decision_engine_batch_item_failed", custom_id=entry.custom_id, type=entry.result.type
+                        )
+
+        except Exception as e:
+            logger.error("decision_engine_batch_error", error=str(e), count=len(tasks))
+
+        workflows = []
+        for i, (task, _) in enumerate(tasks):
+            response_text = responses.get(f"task_{i}")
+            if response_text is None:
+                workflows.append(self._create_fallback_workflow(task))
+            else:
+                workflows.append(self._parse_workflow(task, response_text))
 
-            response_text = response.content[0].text.strip()
+        return workflows
 
+    def _build_prompt(self, task: str, context: dict | None) -> str:
+        """Format the routing prompt for a task."""
+        context_str = orjson.dumps(context, option=orjson.OPT_NON_STR_KEYS).decode() if context else "None"
+        return self.ROUTING_PROMPT.format(task=task, context=context_str)
+
+    def _parse_workflow(self, task: str, response_text: str) -> Workflow:
+        """
+        Build a Workflow from Claude's routing response.
+
+        Args:
+            task: Original user request (used for the id and fallback)
+            response_text: Raw response text
+
+        Returns:
+            Parsed workflow, or a fallback workflow if the response is invalid
+        """
+        try:
             # Parse JSON response
-            if response_text.startswith("```"):
-                response_text = response_text.split("```")[1]
-                if response_text.startswith("json"):
-                    response_text = response_text[4:]
-                response_text = response_text.strip()
+            fenced = _FENCE_RE.match(response_text)
+            if fenced:
+                response_text = fenced.group(1)
 
-            workflow_data = json.loads(response_text)
+            workflow_data = orjson.loads(response_text)
 
             # Build workflow
             steps = []
@@ -168,7 +302,7 @@ JSON uniquement, pas de markdown."""
                 steps.append(step)
 
             workflow = Workflow(
-                id=f"wf_{hash(task) % 10000:04d}",
+                id=f"wf_{hashlib.blake2b(task.encode(), digest_size=6).hexdigest()}",
                 steps=steps,
                 reasoning=workflow_data.get("reasoning", ""),
                 parallel_groups=workflow_data.get("parallel_groups", []),
@@ -183,7 +317,7 @@ JSON uniquement, pas de markdown."""
 
             return workflow
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error("decision_engine_json_error", error=str(e), response=response_text[:200])
             # Return a fallback single-step workflow
             return self._create_fallback_workflow(task)
@@ -191,17 +325,39 @@ JSON uniquement, pas de markdown."""
             logger.error("decision_engine_error", error=str(e))
             return self._create_fallback_workflow(task)
 
+    async def _stream_response(self, prompt: str) -> str:
+        """
+        Stream the routing response from Claude.
+
+        Text deltas are collected as they arrive so the event loop is not held
+        by one large response body.
+
+        Args:
+            prompt: Fully formatted routing prompt
+
+        Returns:
+            Complete response text, stripped
+        """
+        chunks: list[str] = []
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=2048,
+            messages=[{"role": "user", "content": prompt}],
+        ) as stream:
+            async for text in stream.text_stream:
+                chunks.append(text)
+
+        return "".join(chunks).strip()
+
     def _create_fallback_workflow(self, task: str) -> Workflow:
         """Create a simple fallback workflow when routing fails."""
         # Try to determine agent from keywords
         task_lower = task.lower()
 
-        if any(word in task_lower for word in ["vidéo", "video", "audio", "upload", "transcri"]):
-            agent = AgentType.AUDIO
-        elif any(word in task_lower for word in ["pattern", "analyse", "extract", "technique"]):
-            agent = AgentType.PATTERN
-        else:
-            agent = AgentType.TRAINING
+        agent = next(
+            (agent for agent, keywords in self.FALLBACK_KEYWORDS if keywords.search(task_lower)),
+            AgentType.TRAINING,
+        )
 
         return Workflow(
             id="wf_fallback",
@@ -255,18 +411,7 @@ JSON uniquement, pas de markdown."""
                 continue
 
             # Check if all dependencies are completed
-            deps_met = True
-            for dep in step.depends_on:
-                # Parse dependency (e.g., "step_0" -> 0)
-                try:
-                    dep_idx = int(dep.replace("step_", ""))
-                    if dep_idx not in completed:
-                        deps_met = False
-                        break
-                except ValueError:
-                    continue
-
-            if deps_met:
+            if all(dep_idx in completed for dep_idx in step.resolved_deps):
                 ready.append(i)
 
         # Sort by priority
@@ -9,9 +9,11 @@ Manages the lifecycle of multi-agent workflows:
 """
 
 import asyncio
+import heapq
 import uuid
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any
 
 import structlog
@@ -27,12 +29,14 @@ class WorkflowExecution:
 
     workflow_id: str
     request_id: str
-    status: str = "pending"  # pending, running, completed, failed
+    status: str = "pending"  # pending, running, completed, failed, cancelled
     started_at: datetime | None = None
     completed_at: datetime | None = None
     results: dict = field(default_factory=dict)
     errors: list = field(default_factory=list)
     current_step: int = 0
+    tasks: dict[asyncio.Task, int] = field(default_factory=dict)  # in-flight step tasks -> step index
+    cancelled: asyncio.Event = field(default_factory=asyncio.Event)
 
 
 class ChampionCloneOrchestrator:
@@ -46,6 +50,10 @@ class ChampionCloneOrchestrator:
     - Aggregate and return results
     """
 
+    # Workflow records are kept for status queries, then evicted
+    MAX_TRACKED_WORKFLOWS = 10_000
+    WORKFLOW_TTL_SECONDS = 3600
+
     def __init__(self):
         self.decision_engine = DecisionEngine()
         self.agents = {}
@@ -101,6 +109,35 @@ class ChampionCloneOrchestrator:
             logger.error("orchestrator_error", request_id=request_id, error=str(e))
             return {"request_id": request_id, "status": "error", "error": str(e), "task": task}
 
+    async def stream_route(self, task: str, context: dict | None = None) -> AsyncIterator[dict]:
+        """
+        Route a task like route(), yielding per-step events as they complete.
+
+        Args:
+            task: User's request in natural language
+            context: Optional additional context
+
+        Yields:
+            Workflow events (see stream_workflow)
+        """
+        request_id = str(uuid.uuid4())[:8]
+        logger.info("orchestrator_request", request_id=request_id, task=task[:100])
+
+        self._load_agents()
+
+        try:
+            workflow = await self.decision_engine.analyze(task, context)
+        except Exception as e:
+            logger.error("orchestrator_error", request_id=request_id, error=str(e))
+            yield {
+                "type": "done",
+                "result": {"request_id": request_id, "status": "error", "error": str(e), "task": task},
+            }
+            return
+
+        async for event in self.stream_workflow(workflow, request_id, context):
+            yield event
+
     async def execute_workflow(self, workflow: Workflow, request_id: str, context: dict | None = None) -> dict:
         """
         Execute a complete workflow.
@@ -113,10 +150,31 @@ class ChampionCloneOrchestrator:
         Returns:
             Aggregated results from all steps
         """
+        result: dict = {}
+        async for event in self.stream_workflow(workflow, request_id, context):
+            if event["type"] == "done":
+                result = event["result"]
+        return result
+
+    async def stream_workflow(
+        self, workflow: Workflow, request_id: str, context: dict | None = None
+    ) -> AsyncIterator[dict]:
+        """
+        Execute a workflow, yielding each step result as soon as it is available.
+
+        Args:
+            workflow: The workflow to execute
+            request_id: Unique request identifier
+            context: Additional context to pass to agents
+
+        Yields:
+            {"type": "step_complete", "step_id": ..., "result": ...} per finished step,
+            then {"type": "done", "result": ...} with the aggregated results
+        """
         execution = WorkflowExecution(
             workflow_id=workflow.id, request_id=request_id, status="running", started_at=datetime.utcnow()
         )
-        self.active_workflows[request_id] = execution
+        self._track_workflow(request_id, execution)
 
         logger.info(
             "workflow_started", workflow_id=workflow.id, steps=len(workflow.steps), reasoning=workflow.reasoning[:100]
@@ -125,61 +183,87 @@ class ChampionCloneOrchestrator:
         completed_steps: set[int] = set()
         step_results: dict[str, Any] = {}
 
-        try:
-            while len(completed_steps) < len(workflow.steps):
-                # Get steps ready for execution
-                ready_steps = self.decision_engine.get_next_steps(workflow, completed_steps)
+        steps = workflow.steps
 
-                if not ready_steps:
-                    # No steps ready but not all complete - deadlock or dependency issue
-                    logger.warning("workflow_deadlock", workflow_id=workflow.id)
-                    break
+        # Reverse dependency graph: when a step completes, only its dependents are re-checked
+        dependents: list[list[int]] = [[] for _ in steps]
+        remaining_deps = [len(step.resolved_deps) for step in steps]
+        for i, step in enumerate(steps):
+            for dep_idx in step.resolved_deps:
+                if 0 <= dep_idx < len(steps):
+                    dependents[dep_idx].append(i)
 
-                # Check if we should continue
-                should_continue, reason = await self.decision_engine.should_continue(
-                    step_results,
-                    context.get("original_task", "") if context else "",
-                    [workflow.steps[i] for i in range(len(workflow.steps)) if i not in completed_steps],
-                )
+        # Ready steps, ordered by priority (1 = highest)
+        ready = [(step.priority, i) for i, step in enumerate(steps) if remaining_deps[i] == 0]
+        heapq.heapify(ready)
+        running = execution.tasks
 
-                if not should_continue:
-                    logger.info("workflow_early_stop", reason=reason)
+        try:
+            stopped = False
+            while ready or running:
+                if execution.cancelled.is_set():
+                    # Queued steps never start once the workflow is cancelled
                     break
 
-                # Execute ready steps (potentially in parallel)
-                if len(ready_steps) > 1:
-                    # Parallel execution
-                    tasks = [self._execute_step(workflow.steps[i], i, step_results, context) for i in ready_steps]
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                    for i, result in zip(ready_steps, results, strict=False):
-                        step_id = f"step_{i}"
-                        if isinstance(result, Exception):
-                            step_results[step_id] = {"status": "error", "error": str(result)}
-                            execution.errors.append({"step": step_id, "error": str(result)})
-                        else:
-                            step_results[step_id] = result
-                        completed_steps.add(i)
-
-                else:
-                    # Sequential execution
-                    step_idx = ready_steps[0]
-                    step_id = f"step_{step_idx}"
+                # Start every step whose dependencies are met
+                while ready:
+                    _, i = heapq.heappop(ready)
+                    task = asyncio.create_task(self._execute_step(steps[i], i, step_results, context))
+                    running[task] = i
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+                step_failed = False
+                for task in done:
+                    i = running.pop(task)
+                    if task.cancelled():
+                        continue
 
+                    step_id = f"step_{i}"
                     try:
-                        result = await self._execute_step(workflow.steps[step_idx], step_idx, step_results, context)
-                        step_results[step_id] = result
+                        step_results[step_id] = task.result()
                     except Exception as e:
                         step_results[step_id] = {"status": "error", "error": str(e)}
                         execution.errors.append({"step": step_id, "error": str(e)})
+                        step_failed = True
 
-                    completed_steps.add(step_idx)
+                    yield {"type": "step_complete", "step_id": step_id, "result": step_results[step_id]}
+
+                    completed_steps.add(i)
+                    for j in dependents[i]:
+                        remaining_deps[j] -= 1
+                        if remaining_deps[j] == 0:
+                            heapq.heappush(ready, (steps[j].priority, j))
 
                 execution.current_step = len(completed_steps)
 
-            # Mark workflow complete
-            execution.status = "completed" if not execution.errors else "completed_with_errors"
-            execution.completed_at = datetime.utcnow()
+                # Only re-evaluate the plan when a step failed
+                if step_failed and len(completed_steps) < len(steps):
+                    should_continue, reason = await self.decision_engine.should_continue(
+                        step_results,
+                        context.get("original_task", "") if context else "",
+                        [steps[i] for i in range(len(steps)) if i not in completed_steps],
+                    )
+
+                    if not should_continue:
+                        logger.info("workflow_early_stop", reason=reason)
+                        stopped = True
+                        break
+
+            # Steps still running after an early stop are abandoned; let them
+            # unwind before reporting the workflow as finished
+            await self._cancel_tasks(running)
+
+            if execution.cancelled.is_set():
+                logger.info("workflow_stopped_cancelled", workflow_id=workflow.id)
+            elif not stopped and len(completed_steps) < len(steps):
+                # Steps left whose dependencies can never be met
+                logger.warning("workflow_deadlock", workflow_id=workflow.id)
+
+            # Mark workflow complete (cancel_workflow already set status and completed_at)
+            if not execution.cancelled.is_set():
+                execution.status = "completed" if not execution.errors else "completed_with_errors"
+                execution.completed_at = datetime.utcnow()
             execution.results = step_results
 
             duration_ms = (execution.completed_at - execution.started_at).total_seconds() * 1000
@@ -192,29 +276,70 @@ class ChampionCloneOrchestrator:
                 duration_ms=duration_ms,
             )
 
-            return {
-                "request_id": request_id,
-                "workflow_id": workflow.id,
-                "status": execution.status,
-                "reasoning": workflow.reasoning,
-                "results": step_results,
-                "errors": execution.errors,
-                "duration_ms": duration_ms,
+            yield {
+                "type": "done",
+                "result": {
+                    "request_id": request_id,
+                    "workflow_id": workflow.id,
+                    "status": execution.status,
+                    "reasoning": workflow.reasoning,
+                    "results": step_results,
+                    "errors": execution.errors,
+                    "duration_ms": duration_ms,
+                },
             }
 
         except Exception as e:
             execution.status = "failed"
             execution.completed_at = datetime.utcnow()
             logger.error("workflow_failed", workflow_id=workflow.id, error=str(e))
-
-            return {
-                "request_id": request_id,
-                "workflow_id": workflow.id,
-                "status": "failed",
-                "error": str(e),
-                "partial_results": step_results,
+            await self._cancel_tasks(running)
+
+            yield {
+                "type": "done",
+                "result": {
+                    "request_id": request_id,
+                    "workflow_id": workflow.id,
+                    "status": "failed",
+                    "error": str(e),
+                    "partial_results": step_results,
+                },
             }
 
+        finally:
+            # The consumer may stop iterating before "done"
+            await self._cancel_tasks(running)
+
+    @staticmethod
+    async def _cancel_tasks(tasks) -> None:
+        """Cancel tasks and wait for them to unwind, retrieving their exceptions."""
+        tasks = list(tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _track_workflow(self, request_id: str, execution: WorkflowExecution) -> None:
+        """
+        Register a workflow execution, evicting expired records first.
+
+        Records are stored in start order, so the oldest are at the front:
+        eviction stops at the first one that is both recent and within the cap.
+        Workflows still in flight are moved to the back instead, so they stay
+        reachable by cancel_workflow(); each record is looked at once per call.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.WORKFLOW_TTL_SECONDS)
+
+        for _ in range(len(self.active_workflows)):
+            oldest_id, oldest = next(iter(self.active_workflows.items()))
+            expired = oldest.started_at is not None and oldest.started_at < cutoff
+            if not expired and len(self.active_workflows) < self.MAX_TRACKED_WORKFLOWS:
+                break
+            del self.active_workflows[oldest_id]
+            if oldest.status in ("pending", "running"):
+                self.active_workflows[oldest_id] = oldest
+
+        self.active_workflows[request_id] = execution
+
     async def _execute_step(
         self, step: WorkflowStep, step_index: int, previous_results: dict, context: dict | None
     ) -> dict:
@@ -241,8 +366,8 @@ class ChampionCloneOrchestrator:
 
         # Execute with timeout
         try:
-            result = await asyncio.wait_for(agent.run(step.task, step_context), timeout=step.timeout_seconds)
-            return result
+            async with asyncio.timeout(step.timeout_seconds):
+                return await agent.run(step.task, step_context)
 
         except TimeoutError:
             logger.warning("step_timeout", step_index=step_index, timeout=step.timeout_seconds)
@@ -272,7 +397,15 @@ class ChampionCloneOrchestrator:
 
         execution.status = "cancelled"
         execution.completed_at = datetime.utcnow()
-        logger.info("workflow_cancelled", request_id=request_id)
+        execution.cancelled.set()
+
+        # Stop in-flight agent calls instead of letting them run to completion
+        tasks = list(execution.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.info("workflow_cancelled", request_id=request_id, tasks_cancelled=len(tasks))
         return True
 
     def get_agent_statuses(self) -> dict:
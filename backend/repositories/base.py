@@ -19,6 +19,10 @@ class BaseRepository(Generic[T]):
     """
     Base repository with common CRUD operations.
 
+    Mutating methods only flush: the caller commits once when the unit of
+    work completes. API handlers commit before returning, because ``get_db``
+    only finalizes the session after the response has been sent.
+
     Usage:
         class UserRepository(BaseRepository[User]):
             def __init__(self, session: AsyncSession):
@@ -30,9 +34,8 @@ class BaseRepository(Generic[T]):
         self.model = model
 
     async def get_by_id(self, id: int) -> T | None:
-        """Get a single record by ID."""
-        result = await self.session.execute(select(self.model).where(self.model.id == id))
-        return result.scalar_one_or_none()
+        """Get a single record by ID (served from the identity map when already loaded)."""
+        return await self.session.get(self.model, id)
 
     async def get_all(self, skip: int = 0, limit: int = 100) -> list[T]:
         """Get all records with pagination."""
@@ -42,20 +45,20 @@ class BaseRepository(Generic[T]):
     async def create(self, obj: T) -> T:
         """Create a new record."""
         self.session.add(obj)
-        await self.session.commit()
+        await self.session.flush()
         await self.session.refresh(obj)
         return obj
 
     async def save(self, obj: T) -> T:
         """Save changes to an existing record."""
-        await self.session.commit()
+        await self.session.flush()
         await self.session.refresh(obj)
         return obj
 
     async def delete(self, obj: T) -> None:
         """Delete a record."""
         await self.session.delete(obj)
-        await self.session.commit()
+        await self.session.flush()
 
     async def flush(self) -> None:
         """Flush pending changes without commit."""
@@ -6,6 +6,7 @@ Database operations for Champion model.
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from models import AnalysisLog, Champion
 from repositories.base import BaseRepository
@@ -17,20 +18,31 @@ class ChampionRepository(BaseRepository[Champion]):
     def __init__(self, session: AsyncSession):
         super().__init__(session, Champion)
 
-    async def get_by_status(self, status: str) -> list[Champion]:
+    async def get_by_status(self, status: str, with_sessions: bool = False) -> list[Champion]:
         """Get all champions with a specific status."""
-        result = await self.session.execute(
-            select(Champion).where(Champion.status == status).order_by(Champion.created_at.desc())
-        )
+        query = select(Champion).where(Champion.status == status).order_by(Champion.created_at.desc())
+
+        if with_sessions:
+            query = query.options(selectinload(Champion.sessions))
+
+        result = await self.session.execute(query)
         return list(result.scalars().all())
 
-    async def get_all_ordered(self, status: str | None = None) -> list[Champion]:
-        """Get all champions ordered by creation date, optionally filtered by status."""
+    async def get_all_ordered(self, status: str | None = None, with_sessions: bool = False) -> list[Champion]:
+        """
+        Get all champions ordered by creation date, optionally filtered by status.
+
+        Pass ``with_sessions=True`` when the caller iterates ``champion.sessions``:
+        they are loaded in one batched query instead of one lazy load per champion.
+        """
         query = select(Champion).order_by(Champion.created_at.desc())
 
         if status:
             query = query.where(Champion.status == status)
 
+        if with_sessions:
+            query = query.options(selectinload(Champion.sessions))
+
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
@@ -4,7 +4,7 @@ User Repository.
 Database operations for User model.
 """
 
-from sqlalchemy import select, update
+from sqlalchemy import literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import RefreshToken, User
@@ -29,8 +29,8 @@ class UserRepository(BaseRepository[User]):
 
     async def email_exists(self, email: str) -> bool:
         """Check if email is already registered."""
-        user = await self.get_by_email(email)
-        return user is not None
+        result = await self.session.execute(select(literal(1)).where(User.email == email).limit(1))
+        return result.scalar() is not None
 
 
 class RefreshTokenRepository(BaseRepository[RefreshToken]):
@@ -56,4 +56,3 @@ class RefreshTokenRepository(BaseRepository[RefreshToken]):
     async def revoke_all_user_tokens(self, user_id: int) -> None:
         """Revoke all refresh tokens for a user."""
         await self.session.execute(update(RefreshToken).where(RefreshToken.user_id == user_id).values(is_revoked=True))
-        await self.session.commit()
@@ -2,10 +2,28 @@
 Pydantic schemas for request/response validation.
 """
 
-from datetime import datetime
-from typing import Any
+from datetime import UTC, datetime
+from functools import partial
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, StringConstraints
+
+# Timezone-aware "now" factory, bound once for per-instance timestamp defaults
+_utcnow = partial(datetime.now, UTC)
+
+
+def _lowercase_email_domain(email: str) -> str:
+    """Lowercase the domain part (case-insensitive) so lookups match stored addresses."""
+    local, _, domain = email.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+# Email address: syntax check by pydantic-core's compiled regex, no email-validator round-trip
+Email = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, max_length=254, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$"),
+    AfterValidator(_lowercase_email_domain),
+]
 
 # ============================================
 # Auth Schemas
@@ -15,7 +33,7 @@ from pydantic import BaseModel, ConfigDict, EmailStr, Field
 class UserRegister(BaseModel):
     """Schema for user registration."""
 
-    email: EmailStr = Field(..., description="User email")
+    email: Email = Field(..., description="User email")
     password: str = Field(..., min_length=8, description="Password (min 8 characters)")
     full_name: str | None = Field(None, description="User's full name")
 
@@ -23,14 +41,14 @@ class UserRegister(BaseModel):
 class UserLogin(BaseModel):
     """Schema for user login."""
 
-    email: EmailStr = Field(..., description="User email")
+    email: Email = Field(..., description="User email")
     password: str = Field(..., description="User password")
 
 
 class UserResponse(BaseModel):
     """Schema for user response (no password!)."""
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     id: int
     email: str
@@ -63,7 +81,7 @@ class UserUpdate(BaseModel):
     """Schema for updating user profile."""
 
     full_name: str | None = Field(None, description="User's full name")
-    email: EmailStr | None = Field(None, description="New email address")
+    email: Email | None = Field(None, description="New email address")
 
 
 class PasswordChange(BaseModel):
@@ -107,7 +125,7 @@ class ChampionPatterns(BaseModel):
 class ChampionResponse(ChampionBase):
     """Schema for champion response."""
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     id: int
     # video_path and audio_path removed - never expose internal server paths
@@ -123,7 +141,7 @@ class ChampionResponse(ChampionBase):
 class ChampionListResponse(BaseModel):
     """Schema for listing champions."""
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     id: int
     name: str
@@ -163,9 +181,9 @@ class ScenarioResponse(BaseModel):
 class SessionMessage(BaseModel):
     """Individual message in a training session."""
 
-    role: str = Field(..., pattern="^(champion|user|system)$", description="Message sender")
+    role: Literal["champion", "user", "system"] = Field(..., description="Message sender")
     content: str = Field(..., min_length=1, description="Message content")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=_utcnow)
     feedback: str | None = Field(None, description="AI feedback on user response")
     score: float | None = Field(None, ge=0, le=10, description="Score 0-10")
 
@@ -227,7 +245,7 @@ class SessionSummary(BaseModel):
 class SessionResponse(BaseModel):
     """Full session response."""
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     id: int
     user_id: str
@@ -356,7 +374,7 @@ class ProductInfoCreate(BaseModel):
 class ProductInfoResponse(BaseModel):
     """Schema for ProductInfo response."""
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     id: int
     slug: str
@@ -414,7 +432,7 @@ class ProofElementsCreate(BaseModel):
 class ProofElementsResponse(BaseModel):
     """Schema for ProofElements response."""
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     id: int
     product_id: int
@@ -458,7 +476,7 @@ class CompetitionInfoCreate(BaseModel):
 class CompetitionInfoResponse(BaseModel):
     """Schema for CompetitionInfo response."""
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
     id: int
     product_id: int
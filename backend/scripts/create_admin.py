@@ -13,40 +13,67 @@ import os
 import secrets
 import string
 import sys
+from functools import cache, reduce
 from getpass import getpass
+from operator import or_
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from database import AsyncSessionLocal, init_db
 from models import JourneyStage, User, UserJourney
 from services.auth import hash_password
 
+_SYSRAND = secrets.SystemRandom()
+_ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+# Octet aléatoire -> caractère de l'alphabet. Les octets au-delà du plus grand
+# multiple de len(_ALPHABET) sont rejetés pour garder une distribution uniforme.
+_ACCEPTED_BYTES = 256 - 256 % len(_ALPHABET)
+_BYTE_TO_CHAR = bytes(ord(_ALPHABET[b % len(_ALPHABET)]) for b in range(256))
+_REJECTED_BYTES = bytes(range(_ACCEPTED_BYTES, 256))
+
 
 def generate_secure_password(length: int = 16) -> str:
-    alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
-    pwd = [
-        secrets.choice(string.ascii_lowercase),
-        secrets.choice(string.ascii_uppercase),
-        secrets.choice(string.digits),
-        secrets.choice("!@#$%^&*"),
-    ]
-    pwd += [secrets.choice(alphabet) for _ in range(length - 4)]
-    secrets.SystemRandom().shuffle(pwd)
-    return "".join(pwd)
+    pwd = bytearray(
+        [
+            ord(_SYSRAND.choice(string.ascii_lowercase)),
+            ord(_SYSRAND.choice(string.ascii_uppercase)),
+            ord(_SYSRAND.choice(string.digits)),
+            ord(_SYSRAND.choice("!@#$%^&*")),
+        ]
+    )
+    while len(pwd) < length:
+        pwd += secrets.token_bytes(length).translate(_BYTE_TO_CHAR, _REJECTED_BYTES)[: length - len(pwd)]
+    _SYSRAND.shuffle(pwd)
+    return pwd.decode("ascii")
+
+
+# Bits par catégorie de caractère, combinés en une seule passe sur le mot de passe
+_UPPER, _LOWER, _DIGIT, _SPECIAL = 1, 2, 4, 8
+
+
+@cache
+def _char_flags(c: str) -> int:
+    return (
+        (_UPPER if c.isupper() else 0)
+        | (_LOWER if c.islower() else 0)
+        | (_DIGIT if c.isdigit() else 0)
+        | (_SPECIAL if c in "!@#$%^&*()_+-=" else 0)
+    )
 
 
 def validate_password(password: str) -> tuple[bool, str]:
     if len(password) < 12:
         return False, "Minimum 12 caractères"
-    if not any(c.isupper() for c in password):
+    flags = reduce(or_, map(_char_flags, password), 0)
+    if not flags & _UPPER:
         return False, "Au moins 1 majuscule"
-    if not any(c.islower() for c in password):
+    if not flags & _LOWER:
         return False, "Au moins 1 minuscule"
-    if not any(c.isdigit() for c in password):
+    if not flags & _DIGIT:
         return False, "Au moins 1 chiffre"
-    if not any(c in "!@#$%^&*()_+-=" for c in password):
+    if not flags & _SPECIAL:
         return False, "Au moins 1 caractère spécial"
     return True, "OK"
 
@@ -55,19 +82,19 @@ async def create_admin(email: str, password: str):
     await init_db()
 
     async with AsyncSessionLocal() as db:
-        existing = await db.scalar(select(User).where(User.email == email))
+        existing = (await db.execute(select(User.id, User.role).where(User.email == email))).first()
         if existing:
             if existing.role == "admin":
                 print(f"⚠️  Admin existe déjà: {email}")
                 return False
-            existing.role = "admin"
+            await db.execute(update(User).where(User.id == existing.id).values(role="admin"))
             await db.commit()
             print(f"✅ {email} promu admin")
             return True
 
         admin = User(
             email=email,
-            hashed_password=hash_password(password),
+            hashed_password=await asyncio.to_thread(hash_password, password),
             full_name="Administrateur",
             role="admin",
             is_active=True,
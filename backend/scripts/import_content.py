@@ -11,285 +11,321 @@ The content directory must contain:
   - sectors.json
   - cours.json
   - quiz.json
+
+Set IMPORT_VERBOSE=1 to print every added row.
 """
 
 import asyncio
-import json
+import os
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import select
+import orjson
+from sqlalchemy import JSON, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
 
+from database import DATABASE_URL, close_db
 from database import AsyncSessionLocal as async_session_maker
 from models import Course, DifficultyLevel, Quiz, Sector, Skill
 
+# Per-row "added" lines are only printed on request; main() prints the totals
+VERBOSE = bool(os.getenv("IMPORT_VERBOSE"))
 
-async def import_skills(content_dir: Path):
-    """Import skills from JSON file."""
-    file_path = content_dir / "skills.json"
-    if not file_path.exists():
-        print(f"  ⚠️  File not found: {file_path}")
-        return 0
+# Rows per executemany batch; larger batches stop paying off and grow server memory
+BULK_CHUNK_SIZE = 1000
 
-    with open(file_path, encoding="utf-8") as f:
-        data = json.load(f)
+# INSERT ... ON CONFLICT is dialect-specific; match the engine configured in database.py
+dialect_insert = sqlite.insert if DATABASE_URL.startswith("sqlite") else postgresql.insert
 
-    count = 0
-    async with async_session_maker() as db:
-        for skill_data in data.get("skills", []):
-            # Check if already exists
-            existing = await db.scalar(select(Skill).where(Skill.slug == skill_data.get("id", skill_data.get("slug"))))
-
-            if existing:
-                print(f"  ⏭️  Skill exists: {skill_data.get('id', skill_data.get('slug'))}")
-                continue
-
-            skill = Skill(
-                slug=skill_data.get("id", skill_data.get("slug")),
-                name=skill_data["name"],
-                level=skill_data["level"],
-                description=skill_data.get("description", ""),
-                order=skill_data.get("order", 0),
-                theory_duration_minutes=skill_data.get("theory_duration_minutes", 5),
-                practice_duration_minutes=skill_data.get("practice_duration_minutes", 15),
-                learning_objectives=skill_data.get("learning_objectives", []),
-                key_concepts=skill_data.get("key_concepts", []),
-                evaluation_criteria=skill_data.get("evaluation_criteria", []),
-                pass_threshold=skill_data.get("pass_threshold", 65),
-                scenarios_required=skill_data.get("scenarios_required", 3),
-                prospect_instructions=skill_data.get("prospect_instructions", ""),
-                emotional_focus=skill_data.get("emotional_focus", []),
-                common_mistakes=skill_data.get("common_mistakes", []),
-            )
-            db.add(skill)
-            count += 1
-            print(f"  ✅ Skill added: {skill_data.get('id', skill_data.get('slug'))}")
 
-        await db.commit()
+async def bulk_insert(db, stmt, rows: list[dict], chunk_size: int = BULK_CHUNK_SIZE):
+    """Execute an INSERT statement over rows, chunk_size rows per executemany."""
+    for start in range(0, len(rows), chunk_size):
+        await db.execute(stmt, rows[start : start + chunk_size])
 
-    return count
 
+async def copy_insert(db, model, rows: list[dict]):
+    """Load rows into model's table with COPY on PostgreSQL, batched INSERTs elsewhere."""
+    if DATABASE_URL.startswith("sqlite") or not rows:
+        await bulk_insert(db, insert(model), rows)
+        return
 
-async def import_difficulty_levels(content_dir: Path):
-    """Import difficulty levels from JSON file (V2 format with upsert)."""
-    file_path = content_dir / "difficulty_levels.json"
-    if not file_path.exists():
+    columns = list(rows[0])
+    # asyncpg's json codec takes text, so serialize JSON columns up front
+    json_columns = {column.name for column in model.__table__.columns if isinstance(column.type, JSON)}
+    records = [
+        tuple(orjson.dumps(row[column]).decode() if column in json_columns else row[column] for column in columns)
+        for row in rows
+    ]
+
+    # Same connection, and therefore same transaction, as the session
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(model.__tablename__, records=records, columns=columns)
+
+
+async def load_json(file_path: Path) -> dict | None:
+    """Read a content file without blocking the event loop; None if it is missing."""
+    if not await asyncio.to_thread(file_path.exists):
         print(f"  ⚠️  File not found: {file_path}")
+        return None
+    return orjson.loads(await asyncio.to_thread(file_path.read_bytes))
+
+
+async def import_skills(db, content_dir: Path):
+    """Import skills from JSON file."""
+    data = await load_json(content_dir / "skills.json")
+    if data is None:
         return 0
 
-    with open(file_path, encoding="utf-8") as f:
-        data = json.load(f)
+    skills = data.get("skills", [])
+    rows = []
+    # Slugs are text in the table, but content files may use numeric ids
+    slugs = [str(skill_data.get("id", skill_data.get("slug"))) for skill_data in skills]
+    # Prefetch existing slugs in one query instead of one SELECT per row
+    existing_slugs = set(await db.scalars(select(Skill.slug).where(Skill.slug.in_(set(slugs)))))
+
+    for slug, skill_data in zip(slugs, skills, strict=True):
+        if slug in existing_slugs:
+            print(f"  ⏭️  Skill exists: {slug}")
+            continue
+
+        rows.append(
+            {
+                "slug": slug,
+                "name": skill_data["name"],
+                "level": skill_data["level"],
+                "description": skill_data.get("description", ""),
+                "order": skill_data.get("order", 0),
+                "theory_duration_minutes": skill_data.get("theory_duration_minutes", 5),
+                "practice_duration_minutes": skill_data.get("practice_duration_minutes", 15),
+                "learning_objectives": skill_data.get("learning_objectives", []),
+                "key_concepts": skill_data.get("key_concepts", []),
+                "evaluation_criteria": skill_data.get("evaluation_criteria", []),
+                "pass_threshold": skill_data.get("pass_threshold", 65),
+                "scenarios_required": skill_data.get("scenarios_required", 3),
+                "prospect_instructions": skill_data.get("prospect_instructions", ""),
+                "emotional_focus": skill_data.get("emotional_focus", []),
+                "common_mistakes": skill_data.get("common_mistakes", []),
+            }
+        )
+        if VERBOSE:
+            print(f"  ✅ Skill added: {slug}")
+
+    # Batched executemany instead of one ORM flush per object
+    await bulk_insert(db, insert(Skill), rows)
+
+    return len(rows)
+
+
+async def import_difficulty_levels(db, content_dir: Path):
+    """Import difficulty levels from JSON file (V2 format with upsert)."""
+    data = await load_json(content_dir / "difficulty_levels.json")
+    if data is None:
+        return 0
 
-    count = 0
+    levels = data.get("difficulty_levels", [])
+    rows = []
+    added = 0
     updated = 0
-    async with async_session_maker() as db:
-        for level_data in data.get("difficulty_levels", []):
-            # Handle both V1 (level) and V2 (level_id) format
-            level_key = level_data.get("level_id", level_data.get("level"))
-
-            existing = await db.scalar(select(DifficultyLevel).where(DifficultyLevel.level == level_key))
-
-            # Handle both V1 (days_range) and V2 (days) format
-            days_range = level_data.get("days", level_data.get("days_range", [1, 30]))
-
-            # Extract interruption phrases from interruption_triggers if present
-            interruption_phrases = level_data.get("interruption_phrases", [])
-            if not interruption_phrases and level_data.get("interruption_triggers"):
-                interruption_phrases = level_data["interruption_triggers"].get("interruption_phrases", [])
-
-            if existing:
-                # UPDATE existing level with V2 fields
-                existing.name = level_data["name"]
-                existing.description = level_data.get("description", "")
-                existing.days_range_start = days_range[0] if isinstance(days_range, list) else 1
-                existing.days_range_end = days_range[1] if isinstance(days_range, list) else 30
-                existing.ai_behavior = level_data.get("ai_behavior", {})
-                existing.prospect_personality = level_data.get(
-                    "prospect_baseline", level_data.get("prospect_personality", {})
-                )
-                existing.conversation_dynamics = level_data.get("conversation_dynamics", {})
-                existing.feedback_settings = level_data.get("feedback_settings", {})
-                existing.interruption_phrases = interruption_phrases
-
+    # Handle both V1 (level) and V2 (level_id) format
+    incoming = {level_data.get("level_id", level_data.get("level")) for level_data in levels}
+    # Only used to report added vs updated; the upsert below decides on its own
+    existing_levels = set(await db.scalars(select(DifficultyLevel.level).where(DifficultyLevel.level.in_(incoming))))
+
+    for level_data in levels:
+        level_key = level_data.get("level_id", level_data.get("level"))
+
+        # Handle both V1 (days_range) and V2 (days) format
+        days_range = level_data.get("days", level_data.get("days_range", [1, 30]))
+
+        # Extract interruption phrases from interruption_triggers if present
+        interruption_phrases = level_data.get("interruption_phrases", [])
+        if not interruption_phrases and level_data.get("interruption_triggers"):
+            interruption_phrases = level_data["interruption_triggers"].get("interruption_phrases", [])
+
+        rows.append(
+            {
+                "level": level_key,
+                "name": level_data["name"],
+                "description": level_data.get("description", ""),
+                "days_range_start": days_range[0] if isinstance(days_range, list) else 1,
+                "days_range_end": days_range[1] if isinstance(days_range, list) else 30,
+                "ai_behavior": level_data.get("ai_behavior", {}),
+                "prospect_personality": level_data.get("prospect_baseline", level_data.get("prospect_personality", {})),
+                "conversation_dynamics": level_data.get("conversation_dynamics", {}),
+                "feedback_settings": level_data.get("feedback_settings", {}),
+                "interruption_phrases": interruption_phrases,
                 # V2 fields
-                existing.emotional_state_system = level_data.get("emotional_state_system", {})
-                existing.hidden_objections = level_data.get("hidden_objections", {})
-                existing.situational_events = level_data.get("situational_events", {})
-                existing.reversals = level_data.get("reversals", {})
-                existing.conversion_triggers = level_data.get("conversion_triggers", {})
-                existing.memory_coherence = level_data.get("memory_coherence", {})
-                existing.hints_system = level_data.get("hints_system", {})
-                existing.scoring = level_data.get("scoring", {})
-
-                updated += 1
-                print(f"  🔄 Level updated: {level_key}")
-            else:
-                level = DifficultyLevel(
-                    level=level_key,
-                    name=level_data["name"],
-                    description=level_data.get("description", ""),
-                    days_range_start=days_range[0] if isinstance(days_range, list) else 1,
-                    days_range_end=days_range[1] if isinstance(days_range, list) else 30,
-                    ai_behavior=level_data.get("ai_behavior", {}),
-                    prospect_personality=level_data.get(
-                        "prospect_baseline", level_data.get("prospect_personality", {})
-                    ),
-                    conversation_dynamics=level_data.get("conversation_dynamics", {}),
-                    feedback_settings=level_data.get("feedback_settings", {}),
-                    interruption_phrases=interruption_phrases,
-                    # V2 fields
-                    emotional_state_system=level_data.get("emotional_state_system", {}),
-                    hidden_objections=level_data.get("hidden_objections", {}),
-                    situational_events=level_data.get("situational_events", {}),
-                    reversals=level_data.get("reversals", {}),
-                    conversion_triggers=level_data.get("conversion_triggers", {}),
-                    memory_coherence=level_data.get("memory_coherence", {}),
-                    hints_system=level_data.get("hints_system", {}),
-                    scoring=level_data.get("scoring", {}),
-                )
-                db.add(level)
-                count += 1
+                "emotional_state_system": level_data.get("emotional_state_system", {}),
+                "hidden_objections": level_data.get("hidden_objections", {}),
+                "situational_events": level_data.get("situational_events", {}),
+                "reversals": level_data.get("reversals", {}),
+                "conversion_triggers": level_data.get("conversion_triggers", {}),
+                "memory_coherence": level_data.get("memory_coherence", {}),
+                "hints_system": level_data.get("hints_system", {}),
+                "scoring": level_data.get("scoring", {}),
+            }
+        )
+
+        if level_key in existing_levels:
+            updated += 1
+            print(f"  🔄 Level updated: {level_key}")
+        else:
+            added += 1
+            if VERBOSE:
                 print(f"  ✅ Level added: {level_key}")
 
-        await db.commit()
+    if rows:
+        # INSERT ... ON CONFLICT (level) DO UPDATE instead of SELECT + UPDATE/INSERT per level
+        stmt = dialect_insert(DifficultyLevel)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DifficultyLevel.level],
+            set_={key: stmt.excluded[key] for key in rows[0] if key != "level"},
+        )
+        await bulk_insert(db, stmt, rows)
 
     if updated > 0:
         print(f"   → {updated} levels updated with V2 fields")
-    return count
+    return added
 
 
-async def import_sectors(content_dir: Path):
+async def import_sectors(db, content_dir: Path):
     """Import sectors from JSON file."""
-    file_path = content_dir / "sectors.json"
-    if not file_path.exists():
-        print(f"  ⚠️  File not found: {file_path}")
+    data = await load_json(content_dir / "sectors.json")
+    if data is None:
         return 0
 
-    with open(file_path, encoding="utf-8") as f:
-        data = json.load(f)
-
-    count = 0
-    async with async_session_maker() as db:
-        for sector_data in data.get("sectors", []):
-            existing = await db.scalar(select(Sector).where(Sector.slug == sector_data["slug"]))
-
-            if existing:
-                print(f"  ⏭️  Sector exists: {sector_data['slug']}")
-                continue
-
-            sector = Sector(
-                slug=sector_data["slug"],
-                name=sector_data["name"],
-                description=sector_data.get("description", ""),
-                icon=sector_data.get("icon", "🏢"),
-                vocabulary=sector_data.get("vocabulary", []),
-                prospect_personas=sector_data.get("prospect_personas", []),
-                typical_objections=sector_data.get("typical_objections", []),
-                agent_context_prompt=sector_data.get("agent_context_prompt", ""),
-            )
-            db.add(sector)
-            count += 1
+    sectors = data.get("sectors", [])
+    rows = []
+    incoming = {sector_data["slug"] for sector_data in sectors}
+    existing_slugs = set(await db.scalars(select(Sector.slug).where(Sector.slug.in_(incoming))))
+
+    for sector_data in sectors:
+        if sector_data["slug"] in existing_slugs:
+            print(f"  ⏭️  Sector exists: {sector_data['slug']}")
+            continue
+
+        rows.append(
+            {
+                "slug": sector_data["slug"],
+                "name": sector_data["name"],
+                "description": sector_data.get("description", ""),
+                "icon": sector_data.get("icon", "🏢"),
+                "vocabulary": sector_data.get("vocabulary", []),
+                "prospect_personas": sector_data.get("prospect_personas", []),
+                "typical_objections": sector_data.get("typical_objections", []),
+                "agent_context_prompt": sector_data.get("agent_context_prompt", ""),
+            }
+        )
+        if VERBOSE:
             print(f"  ✅ Sector added: {sector_data['slug']}")
 
-        await db.commit()
+    await bulk_insert(db, insert(Sector), rows)
 
-    return count
+    return len(rows)
 
 
-async def import_cours(content_dir: Path):
+async def import_cours(db, content_dir: Path):
     """Import cours from JSON file."""
-    file_path = content_dir / "cours.json"
-    if not file_path.exists():
-        print(f"  ⚠️  File not found: {file_path}")
+    data = await load_json(content_dir / "cours.json")
+    if data is None:
         return 0
 
-    with open(file_path, encoding="utf-8") as f:
-        data = json.load(f)
-
-    count = 0
-    async with async_session_maker() as db:
-        for course_data in data.get("cours", []):
-            existing = await db.scalar(select(Course).where(Course.day == course_data["day"]))
-
-            if existing:
-                print(f"  ⏭️  Course exists: day {course_data['day']}")
-                continue
-
-            # Get skill_id if provided
-            skill_id = None
-            if course_data.get("skill_id"):
-                skill = await db.scalar(select(Skill).where(Skill.slug == course_data["skill_id"]))
-                skill_id = skill.id if skill else None
-
-            course = Course(
-                day=course_data["day"],
-                level=course_data["level"],
-                skill_id=skill_id,
-                title=course_data["title"],
-                objective=course_data.get("objective", ""),
-                duration_minutes=course_data.get("duration_minutes", 5),
-                key_points=course_data.get("key_points", []),
-                common_mistakes=course_data.get("common_mistakes", []),
-                emotional_tips=course_data.get("emotional_tips", []),
-                takeaways=course_data.get("takeaways", []),
-            )
-            db.add(course)
-            count += 1
+    courses = data.get("cours", [])
+    rows = []
+    incoming_days = {course_data["day"] for course_data in courses}
+    existing_days = set(await db.scalars(select(Course.day).where(Course.day.in_(incoming_days))))
+
+    # Resolve every referenced skill slug -> id in one query
+    skill_slugs = {course_data["skill_id"] for course_data in courses if course_data.get("skill_id")}
+    skill_ids = dict((await db.execute(select(Skill.slug, Skill.id).where(Skill.slug.in_(skill_slugs)))).all())
+
+    for course_data in courses:
+        if course_data["day"] in existing_days:
+            print(f"  ⏭️  Course exists: day {course_data['day']}")
+            continue
+
+        rows.append(
+            {
+                "day": course_data["day"],
+                "level": course_data["level"],
+                "skill_id": skill_ids.get(course_data.get("skill_id")),
+                "title": course_data["title"],
+                "objective": course_data.get("objective", ""),
+                "duration_minutes": course_data.get("duration_minutes", 5),
+                "key_points": course_data.get("key_points", []),
+                "common_mistakes": course_data.get("common_mistakes", []),
+                "emotional_tips": course_data.get("emotional_tips", []),
+                "takeaways": course_data.get("takeaways", []),
+            }
+        )
+        if VERBOSE:
             print(f"  ✅ Course added: day {course_data['day']}")
 
-        await db.commit()
+    await copy_insert(db, Course, rows)
 
-    return count
+    return len(rows)
 
 
-async def import_quiz(content_dir: Path):
+async def import_quiz(db, content_dir: Path):
     """Import quiz from JSON file."""
-    file_path = content_dir / "quiz.json"
-    if not file_path.exists():
-        print(f"  ⚠️  File not found: {file_path}")
+    data = await load_json(content_dir / "quiz.json")
+    if data is None:
         return 0
 
-    with open(file_path, encoding="utf-8") as f:
-        data = json.load(f)
+    quizzes = data.get("quiz", [])
+    rows = []
+    skill_slugs = {quiz_data["skill_id"] for quiz_data in quizzes}
+    skill_ids = dict((await db.execute(select(Skill.slug, Skill.id).where(Skill.slug.in_(skill_slugs)))).all())
+    existing_skill_ids = set(await db.scalars(select(Quiz.skill_id).where(Quiz.skill_id.in_(skill_ids.values()))))
 
-    count = 0
-    async with async_session_maker() as db:
-        for quiz_data in data.get("quiz", []):
-            # Get skill
-            skill = await db.scalar(select(Skill).where(Skill.slug == quiz_data["skill_id"]))
-
-            if not skill:
-                print(f"  ⚠️  Skill not found: {quiz_data['skill_id']}")
-                continue
+    for quiz_data in quizzes:
+        skill_id = skill_ids.get(quiz_data["skill_id"])
 
-            existing = await db.scalar(select(Quiz).where(Quiz.skill_id == skill.id))
+        if not skill_id:
+            print(f"  ⚠️  Skill not found: {quiz_data['skill_id']}")
+            continue
 
-            if existing:
-                print(f"  ⏭️  Quiz exists: {quiz_data['skill_id']}")
-                continue
+        if skill_id in existing_skill_ids:
+            print(f"  ⏭️  Quiz exists: {quiz_data['skill_id']}")
+            continue
 
-            quiz = Quiz(skill_id=skill.id, questions=quiz_data["questions"])
-            db.add(quiz)
-            count += 1
+        rows.append({"skill_id": skill_id, "questions": quiz_data["questions"]})
+        if VERBOSE:
             print(f"  ✅ Quiz added: {quiz_data['skill_id']}")
 
-        await db.commit()
+    await copy_insert(db, Quiz, rows)
+
+    return len(rows)
 
-    return count
+
+async def run_importer(db, importer, content_dir: Path) -> int:
+    """Run one importer inside a SAVEPOINT so a failure only discards its own rows."""
+    try:
+        async with db.begin_nested():
+            return await importer(db, content_dir)
+    except Exception as e:
+        print(f"  ❌ {importer.__name__} failed, changes rolled back: {e}")
+        return 0
 
 
 async def verify_import():
     """Verify import counts."""
-    from sqlalchemy import func
-
     async with async_session_maker() as db:
-        skills = await db.scalar(select(func.count(Skill.id)))
-        sectors = await db.scalar(select(func.count(Sector.id)))
-        cours = await db.scalar(select(func.count(Course.id)))
-        quiz = await db.scalar(select(func.count(Quiz.id)))
-        levels = await db.scalar(select(func.count(DifficultyLevel.id)))
+        # One round-trip: each count is a scalar subquery of a single SELECT
+        skills, sectors, cours, quiz, levels = (
+            await db.execute(
+                select(
+                    *(
+                        select(func.count(model.id)).scalar_subquery()
+                        for model in (Skill, Sector, Course, Quiz, DifficultyLevel)
+                    )
+                )
+            )
+        ).one()
 
         print("\n📊 VERIFICATION:")
         print(f"   Skills: {skills}")
@@ -300,6 +336,12 @@ async def verify_import():
 
 
 async def main():
+    """
+    Import every content file, then print table counts.
+
+    All importers share one session and commit once at the end; each runs in
+    its own SAVEPOINT, so a broken file only rolls back that importer's rows.
+    """
     if len(sys.argv) < 2:
         print("Usage: python scripts/import_content.py /path/to/content/")
         print("\nThe directory must contain:")
@@ -322,27 +364,29 @@ async def main():
 
     print(f"📁 Source: {content_dir}\n")
 
-    print("📚 Importing skills...")
-    skills_count = await import_skills(content_dir)
-    print(f"   → {skills_count} skills imported\n")
+    async with async_session_maker() as db, db.begin():
+        print("📚 Importing skills...")
+        skills_count = await run_importer(db, import_skills, content_dir)
+        print(f"   → {skills_count} skills imported\n")
 
-    print("🎚️  Importing difficulty levels...")
-    levels_count = await import_difficulty_levels(content_dir)
-    print(f"   → {levels_count} levels imported\n")
+        print("🎚️  Importing difficulty levels...")
+        levels_count = await run_importer(db, import_difficulty_levels, content_dir)
+        print(f"   → {levels_count} levels imported\n")
 
-    print("🏢 Importing sectors...")
-    sectors_count = await import_sectors(content_dir)
-    print(f"   → {sectors_count} sectors imported\n")
+        print("🏢 Importing sectors...")
+        sectors_count = await run_importer(db, import_sectors, content_dir)
+        print(f"   → {sectors_count} sectors imported\n")
 
-    print("📖 Importing cours...")
-    cours_count = await import_cours(content_dir)
-    print(f"   → {cours_count} cours imported\n")
+        print("📖 Importing cours...")
+        cours_count = await run_importer(db, import_cours, content_dir)
+        print(f"   → {cours_count} cours imported\n")
 
-    print("❓ Importing quiz...")
-    quiz_count = await import_quiz(content_dir)
-    print(f"   → {quiz_count} quiz imported")
+        print("❓ Importing quiz...")
+        quiz_count = await run_importer(db, import_quiz, content_dir)
+        print(f"   → {quiz_count} quiz imported")
 
     await verify_import()
+    await close_db()
 
     print("\n" + "=" * 50)
     print("   ✅ IMPORT COMPLETE")
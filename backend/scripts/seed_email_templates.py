@@ -11,57 +11,96 @@ Usage:
 import asyncio
 import sys
 from pathlib import Path
+from string import Template
 
 # Add backend to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import select
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
 
-from database import AsyncSessionLocal, init_db
+from database import DATABASE_URL, AsyncSessionLocal, close_db, engine, init_db
 from models import EmailTemplate, EmailTrigger
 
-# Email templates to seed
-TEMPLATES = [
-    {
-        "trigger": EmailTrigger.WELCOME.value,
-        "subject": "Bienvenue sur Champion Clone !",
-        "body_html": """
-<!DOCTYPE html>
+# INSERT ... ON CONFLICT is dialect-specific; match the engine configured in database.py
+dialect_insert = sqlite.insert if DATABASE_URL.startswith("sqlite") else postgresql.insert
+
+# Layout shared by every HTML email. string.Template's $-placeholders are filled
+# here, while the {{var}} ones are left for EmailService to render at send time.
+_HTML_LAYOUT = Template("""<!DOCTYPE html>
 <html>
 <head>
     <style>
         body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
         .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+        .header { background: linear-gradient(135deg, $gradient); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
         .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .button { display: inline-block; background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
+$styles        .button { display: inline-block; background: $accent; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
         .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <h1>Bienvenue, {{user_name}} !</h1>
+            <h1>$title</h1>
         </div>
         <div class="content">
-            <p>Merci de rejoindre Champion Clone !</p>
-            <p>Vous etes maintenant pret a :</p>
-            <ul>
-                <li>Uploader des videos de vos meilleurs commerciaux</li>
-                <li>Extraire automatiquement leurs techniques de vente</li>
-                <li>Entrainer votre equipe avec des scenarios personnalises</li>
-            </ul>
+            $content
             <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Commencer maintenant</a>
+                <a href="{{app_url}}/dashboard" class="button">$button</a>
             </p>
         </div>
         <div class="footer">
-            <p>{{app_name}} - Entrainement commercial IA</p>
+            <p>$footer</p>
         </div>
     </div>
 </body>
-</html>
-        """,
+</html>""")
+
+
+def _html_email(
+    *,
+    gradient: str,
+    accent: str,
+    title: str,
+    content: str,
+    button: str,
+    footer: str = "{{app_name}}",
+    styles: tuple[str, ...] = (),
+) -> str:
+    """Fill the shared layout; content is the markup between the title and the dashboard button."""
+    return _HTML_LAYOUT.substitute(
+        gradient=gradient,
+        accent=accent,
+        styles="".join(f"        {rule}\n" for rule in styles),
+        title=title,
+        content=content.strip(),
+        button=button,
+        footer=footer,
+    )
+
+
+# Email templates to seed
+TEMPLATES = [
+    {
+        "trigger": EmailTrigger.WELCOME.value,
+        "subject": "Bienvenue sur Champion Clone !",
+        "body_html": _html_email(
+            gradient="#667eea 0%, #764ba2 100%",
+            accent="#667eea",
+            title="Bienvenue, {{user_name}} !",
+            content="""
+            <p>Merci de rejoindre Champion Clone !</p>
+            <p>Vous etes maintenant pret a :</p>
+            <ul>
+                <li>Uploader des videos de vos meilleurs commerciaux</li>
+                <li>Extraire automatiquement leurs techniques de vente</li>
+                <li>Entrainer votre equipe avec des scenarios personnalises</li>
+            </ul>
+            """,
+            button="Commencer maintenant",
+            footer="{{app_name}} - Entrainement commercial IA",
+        ),
         "body_text": """
 Bienvenue, {{user_name}} !
 
@@ -82,25 +121,11 @@ Commencez maintenant : {{app_url}}/dashboard
     {
         "trigger": EmailTrigger.FIRST_CHAMPION.value,
         "subject": "Votre premier Champion est pret !",
-        "body_html": """
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
-        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .button { display: inline-block; background: #11998e; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
-        .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Champion analyse !</h1>
-        </div>
-        <div class="content">
+        "body_html": _html_email(
+            gradient="#11998e 0%, #38ef7d 100%",
+            accent="#11998e",
+            title="Champion analyse !",
+            content="""
             <p>Bonjour {{user_name}},</p>
             <p>Excellente nouvelle ! Votre champion <strong>{{champion_name}}</strong> a ete analyse avec succes.</p>
             <p>Nous avons extrait :</p>
@@ -110,17 +135,9 @@ Commencez maintenant : {{app_url}}/dashboard
                 <li>Les strategies de closing</li>
             </ul>
             <p>Vous pouvez maintenant commencer a vous entrainer !</p>
-            <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Voir les scenarios</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>{{app_name}}</p>
-        </div>
-    </div>
-</body>
-</html>
-        """,
+            """,
+            button="Voir les scenarios",
+        ),
         "body_text": """
 Bonjour {{user_name}},
 
@@ -143,41 +160,21 @@ Voir les scenarios : {{app_url}}/dashboard
     {
         "trigger": EmailTrigger.FIRST_SESSION.value,
         "subject": "Bravo pour votre premiere session !",
-        "body_html": """
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
-        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .score { font-size: 48px; font-weight: bold; color: #f5576c; text-align: center; margin: 20px 0; }
-        .button { display: inline-block; background: #f5576c; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
-        .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Premiere session terminee !</h1>
-        </div>
-        <div class="content">
+        "body_html": _html_email(
+            gradient="#f093fb 0%, #f5576c 100%",
+            accent="#f5576c",
+            styles=(
+                ".score { font-size: 48px; font-weight: bold; color: #f5576c; text-align: center; margin: 20px 0; }",
+            ),
+            title="Premiere session terminee !",
+            content="""
             <p>Bravo {{user_name}} !</p>
             <p>Vous avez termine votre premiere session d'entrainement.</p>
             <div class="score">{{score}}/10</div>
             <p>Continuez a vous entrainer pour ameliorer votre score et maitriser les techniques de vente de vos champions.</p>
-            <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Continuer l'entrainement</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>{{app_name}}</p>
-        </div>
-    </div>
-</body>
-</html>
-        """,
+            """,
+            button="Continuer l'entrainement",
+        ),
         "body_text": """
 Bravo {{user_name}} !
 
@@ -197,40 +194,18 @@ Continuer l'entrainement : {{app_url}}/dashboard
     {
         "trigger": EmailTrigger.INACTIVE_3_DAYS.value,
         "subject": "On vous attend sur Champion Clone !",
-        "body_html": """
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
-        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .button { display: inline-block; background: #667eea; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
-        .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Vous nous manquez !</h1>
-        </div>
-        <div class="content">
+        "body_html": _html_email(
+            gradient="#667eea 0%, #764ba2 100%",
+            accent="#667eea",
+            title="Vous nous manquez !",
+            content="""
             <p>Bonjour {{user_name}},</p>
             <p>Cela fait quelques jours que nous ne vous avons pas vu sur Champion Clone.</p>
             <p>N'oubliez pas que la pratique reguliere est la cle de l'amelioration !</p>
             <p>Vos champions vous attendent pour une nouvelle session d'entrainement.</p>
-            <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Reprendre l'entrainement</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>{{app_name}}</p>
-        </div>
-    </div>
-</body>
-</html>
-        """,
+            """,
+            button="Reprendre l'entrainement",
+        ),
         "body_text": """
 Bonjour {{user_name}},
 
@@ -250,40 +225,18 @@ Reprendre l'entrainement : {{app_url}}/dashboard
     {
         "trigger": EmailTrigger.INACTIVE_7_DAYS.value,
         "subject": "Une semaine deja ? Revenez vous entrainer !",
-        "body_html": """
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #ff6b6b 0%, #feca57 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
-        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .button { display: inline-block; background: #ff6b6b; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
-        .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>On ne vous oublie pas !</h1>
-        </div>
-        <div class="content">
+        "body_html": _html_email(
+            gradient="#ff6b6b 0%, #feca57 100%",
+            accent="#ff6b6b",
+            title="On ne vous oublie pas !",
+            content="""
             <p>Bonjour {{user_name}},</p>
             <p>Une semaine s'est ecoulee depuis votre derniere visite.</p>
             <p>Les meilleurs commerciaux s'entrainent regulierement. Ne laissez pas vos competences s'eroder !</p>
             <p>Que diriez-vous d'une petite session aujourd'hui ?</p>
-            <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Je m'entraine maintenant</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>{{app_name}}</p>
-        </div>
-    </div>
-</body>
-</html>
-        """,
+            """,
+            button="Je m'entraine maintenant",
+        ),
         "body_text": """
 Bonjour {{user_name}},
 
@@ -303,40 +256,18 @@ Je m'entraine maintenant : {{app_url}}/dashboard
     {
         "trigger": EmailTrigger.INACTIVE_30_DAYS.value,
         "subject": "Nous aimerions vous revoir sur Champion Clone",
-        "body_html": """
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #2c3e50 0%, #4ca1af 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
-        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .button { display: inline-block; background: #4ca1af; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
-        .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Cela fait longtemps...</h1>
-        </div>
-        <div class="content">
+        "body_html": _html_email(
+            gradient="#2c3e50 0%, #4ca1af 100%",
+            accent="#4ca1af",
+            title="Cela fait longtemps...",
+            content="""
             <p>Bonjour {{user_name}},</p>
             <p>Cela fait maintenant un mois que vous n'avez pas utilise Champion Clone.</p>
             <p>Beaucoup de choses ont peut-etre change depuis. Nous avons ameliore notre plateforme et vos champions sont toujours la, prets a vous aider a progresser.</p>
             <p>Si vous avez des questions ou besoin d'aide, n'hesitez pas a nous contacter.</p>
-            <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Revenir sur Champion Clone</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>{{app_name}}</p>
-        </div>
-    </div>
-</body>
-</html>
-        """,
+            """,
+            button="Revenir sur Champion Clone",
+        ),
         "body_text": """
 Bonjour {{user_name}},
 
@@ -356,41 +287,19 @@ Revenir sur Champion Clone : {{app_url}}/dashboard
     {
         "trigger": EmailTrigger.MILESTONE_10_SESSIONS.value,
         "subject": "10 sessions ! Vous etes sur la bonne voie !",
-        "body_html": """
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #f7971e 0%, #ffd200 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
-        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .milestone { font-size: 72px; text-align: center; margin: 20px 0; }
-        .button { display: inline-block; background: #f7971e; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
-        .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Felicitations !</h1>
-        </div>
-        <div class="content">
+        "body_html": _html_email(
+            gradient="#f7971e 0%, #ffd200 100%",
+            accent="#f7971e",
+            styles=(".milestone { font-size: 72px; text-align: center; margin: 20px 0; }",),
+            title="Felicitations !",
+            content="""
             <p>Bravo {{user_name}} !</p>
             <div class="milestone">10</div>
             <p style="text-align: center; font-size: 18px;"><strong>sessions completees !</strong></p>
             <p>Votre engagement porte ses fruits. Continuez sur cette lancee pour devenir un veritable champion de la vente !</p>
-            <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Voir mes statistiques</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>{{app_name}}</p>
-        </div>
-    </div>
-</body>
-</html>
-        """,
+            """,
+            button="Voir mes statistiques",
+        ),
         "body_text": """
 Bravo {{user_name}} !
 
@@ -408,43 +317,23 @@ Voir mes statistiques : {{app_url}}/dashboard
     {
         "trigger": EmailTrigger.MILESTONE_50_SESSIONS.value,
         "subject": "50 sessions ! Vous etes un expert !",
-        "body_html": """
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #8e2de2 0%, #4a00e0 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
-        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
-        .milestone { font-size: 72px; text-align: center; margin: 20px 0; }
-        .badge { font-size: 48px; text-align: center; }
-        .button { display: inline-block; background: #8e2de2; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; margin: 20px 0; }
-        .footer { text-align: center; margin-top: 20px; color: #888; font-size: 12px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Incroyable !</h1>
-        </div>
-        <div class="content">
+        "body_html": _html_email(
+            gradient="#8e2de2 0%, #4a00e0 100%",
+            accent="#8e2de2",
+            styles=(
+                ".milestone { font-size: 72px; text-align: center; margin: 20px 0; }",
+                ".badge { font-size: 48px; text-align: center; }",
+            ),
+            title="Incroyable !",
+            content="""
             <div class="badge">&#127942;</div>
             <p style="text-align: center;">Felicitations {{user_name}} !</p>
             <div class="milestone">50</div>
             <p style="text-align: center; font-size: 18px;"><strong>sessions completees !</strong></p>
             <p>Vous faites partie des utilisateurs les plus dedies de Champion Clone. Votre maitrise des techniques de vente doit etre impressionnante maintenant !</p>
-            <p style="text-align: center;">
-                <a href="{{app_url}}/dashboard" class="button">Continuer ma progression</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>{{app_name}}</p>
-        </div>
-    </div>
-</body>
-</html>
-        """,
+            """,
+            button="Continuer ma progression",
+        ),
         "body_text": """
 Felicitations {{user_name}} !
 
@@ -461,51 +350,47 @@ Continuer ma progression : {{app_url}}/dashboard
     },
 ]
 
+# Strip the triple-quoted bodies once at import rather than on every seed run
+for _template in TEMPLATES:
+    _template["body_html"] = _template["body_html"].strip()
+    _template["body_text"] = _template["body_text"].strip()
+
 
 async def seed_email_templates():
     """Seed the email templates."""
-    print("Initializing database...")
-    await init_db()
+    # Only create the schema when missing; create_all probes every table otherwise
+    async with engine.connect() as conn:
+        has_table = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(EmailTemplate.__tablename__))
+    if not has_table:
+        print("Initializing database...")
+        await init_db()
 
     async with AsyncSessionLocal() as db:
         print("\nSeeding email templates...")
 
-        created = 0
-        skipped = 0
-
-        for template_data in TEMPLATES:
-            # Check if template already exists
-            result = await db.execute(select(EmailTemplate).where(EmailTemplate.trigger == template_data["trigger"]))
-            existing = result.scalar_one_or_none()
-
-            if existing:
-                print(f"  [SKIP] {template_data['trigger']} (already exists)")
-                skipped += 1
-                continue
-
-            # Create template
-            template = EmailTemplate(
-                trigger=template_data["trigger"],
-                subject=template_data["subject"],
-                body_html=template_data["body_html"].strip(),
-                body_text=template_data["body_text"].strip(),
-                variables=template_data["variables"],
-                is_active=template_data["is_active"],
-            )
-            db.add(template)
-            print(f"  [CREATE] {template_data['trigger']}")
-            created += 1
-
+        # One INSERT ... ON CONFLICT DO NOTHING; RETURNING tells which triggers were new
+        stmt = dialect_insert(EmailTemplate).values(TEMPLATES).on_conflict_do_nothing(index_elements=["trigger"])
+        created = set(await db.scalars(stmt.returning(EmailTemplate.trigger)))
         await db.commit()
 
+        triggers = [template_data["trigger"] for template_data in TEMPLATES]
+        skipped = [trigger for trigger in triggers if trigger not in created]
+        lines = [f"  [CREATE] {trigger}" for trigger in triggers if trigger in created]
+        if skipped:
+            lines.append(f"  [SKIP] {', '.join(skipped)} (already exist)")
+        sys.stdout.write("\n".join(lines) + "\n")
+
         print("\n" + "=" * 50)
         print("Email templates seeded!")
         print("=" * 50)
-        print(f"  Created: {created}")
-        print(f"  Skipped: {skipped}")
+        print(f"  Created: {len(created)}")
+        print(f"  Skipped: {len(skipped)}")
         print(f"  Total templates: {len(TEMPLATES)}")
         print("=" * 50)
 
+    # Release pooled connections so the process can exit right away
+    await close_db()
+
 
 if __name__ == "__main__":
     asyncio.run(seed_email_templates())
@@ -10,10 +10,13 @@ from pathlib import Path
 # Add parent to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import select
+from sqlalchemy import event, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from database import json_deserializer, json_serializer, set_sqlite_pragmas
 from models import (
     ActivityLog,
     AdminAlert,
@@ -31,12 +34,22 @@ from services.auth import hash_password
 
 DATABASE_URL = "sqlite+aiosqlite:///./champion_clone.db"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# One shared connection: every aiosqlite connection runs its own worker thread
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    poolclass=StaticPool,
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer,
+)
+event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def seed_data():
-    async with async_session() as db:
+    # One transaction for the whole seed: a single commit when the block exits
+    async with async_session() as db, db.begin():
         print("Creating test users...")
 
         # Create test users with various states
@@ -53,32 +66,32 @@ async def seed_data():
             {"email": "nicolas.laurent@example.com", "full_name": "Nicolas Laurent", "subscription_plan": "pro"},
         ]
 
-        created_users = []
-        for i, u_data in enumerate(users_data):
-            # Check if user exists
-            existing = await db.execute(select(User).where(User.email == u_data["email"]))
-            if existing.scalar_one_or_none():
-                print(f"  User {u_data['email']} already exists, skipping...")
-                result = await db.execute(select(User).where(User.email == u_data["email"]))
-                created_users.append(result.scalar_one())
-                continue
-
-            user = User(
-                email=u_data["email"],
-                hashed_password=hash_password("TestPass123!"),
-                full_name=u_data["full_name"],
-                role="user",
-                is_active=random.choice([True, True, True, False]),  # 75% active
-                subscription_plan=u_data["subscription_plan"],
-                subscription_status="active" if random.random() > 0.2 else "expired",
-                created_at=datetime.utcnow() - timedelta(days=random.randint(1, 90)),
-            )
-            db.add(user)
-            await db.flush()
-            created_users.append(user)
-            print(f"  Created user: {user.email}")
-
-        await db.commit()
+        # All test users share one password: hash it once, bcrypt is slow on purpose
+        shared_hash = hash_password("TestPass123!")
+
+        # Insert missing users and get every test user's id back in one statement.
+        # The no-op update on conflict makes existing rows show up in RETURNING too.
+        stmt = sqlite_insert(User).values(
+            [
+                {
+                    "email": u_data["email"],
+                    "hashed_password": shared_hash,
+                    "full_name": u_data["full_name"],
+                    "role": "user",
+                    "is_active": random.choice([True, True, True, False]),  # 75% active
+                    "subscription_plan": u_data["subscription_plan"],
+                    "subscription_status": "active" if random.random() > 0.2 else "expired",
+                    "created_at": datetime.utcnow() - timedelta(days=random.randint(1, 90)),
+                }
+                for u_data in users_data
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(index_elements=[User.email], set_={"email": stmt.excluded.email})
+        users_by_email = {row.email: row for row in await db.execute(stmt.returning(User.id, User.email))}
+
+        # RETURNING order is not guaranteed, keep the users_data order for the owner indexes
+        created_users = [users_by_email[u_data["email"]] for u_data in users_data]
+        print(f"  {len(created_users)} test users ready")
 
         print("\nCreating champions...")
         champions_data = [
@@ -89,25 +102,28 @@ async def seed_data():
             {"name": "Tony Robbins", "desc": "Style inspirant et emotionnel", "owner_idx": 4},
         ]
 
+        media_ids = random.choices(range(1000, 10000), k=2 * len(champions_data))
+        video_paths = [f"/uploads/video_{n}.mp4" for n in media_ids[: len(champions_data)]]
+        audio_paths = [f"/audio/audio_{n}.wav" for n in media_ids[len(champions_data) :]]
+
         created_champions = []
-        for c_data in champions_data:
+        for c_data, video_path, audio_path in zip(champions_data, video_paths, audio_paths, strict=True):
             owner = created_users[c_data["owner_idx"]]
             champion = Champion(
                 user_id=owner.id,
                 name=c_data["name"],
                 description=c_data["desc"],
-                video_path=f"/uploads/video_{random.randint(1000, 9999)}.mp4",
-                audio_path=f"/audio/audio_{random.randint(1000, 9999)}.wav",
+                video_path=video_path,
+                audio_path=audio_path,
                 transcript=f"Transcription de {c_data['name']}...",
                 patterns_json={"techniques": ["closing", "objection_handling"], "score": random.randint(70, 95)},
                 status="ready",
             )
             db.add(champion)
-            await db.flush()
             created_champions.append(champion)
             print(f"  Created champion: {champion.name}")
 
-        await db.commit()
+        await db.flush()
 
         print("\nCreating training sessions...")
         scenarios_list = [
@@ -116,75 +132,93 @@ async def seed_data():
             {"context": "Closing", "prospect_type": "Startup", "challenge": "Decision finale"},
         ]
 
-        for _ in range(25):
-            user = random.choice(created_users)
-            champion = random.choice(created_champions) if created_champions else None
-            if not champion:
-                continue
+        session_rows = []
+        if created_champions:
+            # One random.choices call per column instead of a choice() per row
+            for user, champion, scenario, status in zip(
+                random.choices(created_users, k=25),
+                random.choices(created_champions, k=25),
+                random.choices(scenarios_list, k=25),
+                random.choices(["completed", "completed", "completed", "active", "abandoned"], k=25),
+                strict=True,
+            ):
+                session_rows.append(
+                    {
+                        "user_id": str(user.id),
+                        "champion_id": champion.id,
+                        "scenario": scenario,
+                        "status": status,
+                        "overall_score": random.randint(50, 100) / 10 if random.random() > 0.3 else None,
+                        "feedback_summary": "Bon travail sur le closing, ameliorer l'ecoute active.",
+                        "messages": [
+                            {"role": "champion", "content": "Bonjour, comment puis-je vous aider?"},
+                            {"role": "user", "content": "Je voudrais en savoir plus sur votre produit."},
+                        ],
+                    }
+                )
 
-            session = TrainingSession(
-                user_id=str(user.id),
-                champion_id=champion.id,
-                scenario=random.choice(scenarios_list),
-                status=random.choice(["completed", "completed", "completed", "active", "abandoned"]),
-                overall_score=random.randint(50, 100) / 10 if random.random() > 0.3 else None,
-                feedback_summary="Bon travail sur le closing, ameliorer l'ecoute active.",
-                messages=[
-                    {"role": "champion", "content": "Bonjour, comment puis-je vous aider?"},
-                    {"role": "user", "content": "Je voudrais en savoir plus sur votre produit."},
-                ],
-            )
-            db.add(session)
+        if session_rows:
+            await db.execute(insert(TrainingSession), session_rows)
 
-        await db.commit()
         print("  Created 25 training sessions")
 
         print("\nCreating activity logs...")
         actions = ["login", "logout", "upload", "analyze", "training_start", "training_complete", "register"]
 
-        for day_offset in range(30):
-            num_activities = random.randint(5, 25)
-            for _ in range(num_activities):
-                user = random.choice(created_users)
-                action = random.choice(actions)
-
-                activity = ActivityLog(
-                    user_id=user.id,
-                    action=action,
-                    resource_type="champion"
+        # 5-25 activities per day over 30 days, all random picks drawn up front
+        day_offsets = [day for day in range(30) for _ in range(random.randint(5, 25))]
+        total_activities = len(day_offsets)
+        activity_users = random.choices(created_users, k=total_activities)
+        activity_actions = random.choices(actions, k=total_activities)
+        activity_resources = random.choices(range(1, 101), k=total_activities)
+        activity_hours = random.choices(range(24), k=total_activities)
+        activity_ips = [f"192.168.1.{octet}" for octet in random.choices(range(1, 255), k=total_activities)]
+
+        activity_rows = []
+        for day_offset, user, action, resource_id, hours, ip_address in zip(
+            day_offsets, activity_users, activity_actions, activity_resources, activity_hours, activity_ips, strict=True
+        ):
+            activity_rows.append(
+                {
+                    "user_id": user.id,
+                    "action": action,
+                    "resource_type": "champion"
                     if action in ["upload", "analyze"]
                     else "session"
                     if "training" in action
                     else None,
-                    resource_id=str(random.randint(1, 100)) if action not in ["login", "logout", "register"] else None,
-                    ip_address=f"192.168.1.{random.randint(1, 254)}",
-                    user_agent="Mozilla/5.0",
-                    created_at=datetime.utcnow() - timedelta(days=day_offset, hours=random.randint(0, 23)),
-                )
-                db.add(activity)
+                    "resource_id": str(resource_id) if action not in ["login", "logout", "register"] else None,
+                    "ip_address": ip_address,
+                    "user_agent": "Mozilla/5.0",
+                    "created_at": datetime.utcnow() - timedelta(days=day_offset, hours=hours),
+                }
+            )
+
+        # One executemany instead of an ORM object per row
+        await db.execute(insert(ActivityLog), activity_rows)
 
-        await db.commit()
         print("  Created ~450 activity logs")
 
         print("\nCreating error logs...")
         error_types = ["ValidationError", "APIError", "DatabaseError", "TimeoutError", "AuthError"]
         endpoints = ["/upload", "/analyze", "/training/start", "/auth/login", "/champions"]
 
-        for _ in range(15):
-            error = ErrorLog(
-                user_id=random.choice(created_users).id if random.random() > 0.3 else None,
-                error_type=random.choice(error_types),
-                error_message=f"Error message {random.randint(1000, 9999)}",
-                stack_trace="Traceback...",
-                endpoint=random.choice(endpoints),
-                request_data={"key": "value"},
-                is_resolved=random.choice([True, True, False]),
-                resolution_notes="Fixed by updating validation" if random.random() > 0.5 else None,
-                created_at=datetime.utcnow() - timedelta(days=random.randint(0, 14)),
-            )
-            db.add(error)
+        error_rows = [
+            {
+                "user_id": random.choice(created_users).id if random.random() > 0.3 else None,
+                "error_type": random.choice(error_types),
+                "error_message": f"Error message {random.randint(1000, 9999)}",
+                "stack_trace": "Traceback...",
+                "endpoint": random.choice(endpoints),
+                "request_data": {"key": "value"},
+                "is_resolved": random.choice([True, True, False]),
+                "resolution_notes": "Fixed by updating validation" if random.random() > 0.5 else None,
+                "created_at": datetime.utcnow() - timedelta(days=random.randint(0, 14)),
+            }
+            for _ in range(15)
+        ]
+        await db.execute(insert(ErrorLog), error_rows)
 
-        await db.commit()
         print("  Created 15 error logs")
 
         print("\nCreating email templates...")
@@ -194,39 +228,50 @@ async def seed_data():
             {"trigger": "subscription.expiring", "subject": "Votre abonnement expire bientot"},
         ]
 
-        for t in templates:
-            existing = await db.execute(select(EmailTemplate).where(EmailTemplate.trigger == t["trigger"]))
-            if existing.scalar_one_or_none():
-                continue
-            template = EmailTemplate(
-                trigger=t["trigger"],
-                subject=t["subject"],
-                body_html=f"<h1>{t['subject']}</h1><p>Contenu email...</p>",
-                body_text=f"{t['subject']}\n\nContenu email...",
-                is_active=True,
+        await db.execute(
+            sqlite_insert(EmailTemplate)
+            .values(
+                [
+                    {
+                        "trigger": t["trigger"],
+                        "subject": t["subject"],
+                        "body_html": f"<h1>{t['subject']}</h1><p>Contenu email...</p>",
+                        "body_text": f"{t['subject']}\n\nContenu email...",
+                        "is_active": True,
+                    }
+                    for t in templates
+                ]
             )
-            db.add(template)
+            .on_conflict_do_nothing(index_elements=[EmailTemplate.trigger])
+        )
 
-        await db.commit()
         print("  Created email templates")
 
         print("\nCreating email logs...")
         statuses = ["sent", "sent", "sent", "sent", "opened", "clicked", "failed"]
         triggers = ["user.registered", "training.completed", "subscription.expiring"]
 
-        for _ in range(50):
-            user = random.choice(created_users)
-            email_log = EmailLog(
-                user_id=user.id,
-                trigger=random.choice(triggers),
-                to_email=user.email,
-                subject="Email subject",
-                status=random.choice(statuses),
-                opened_at=datetime.utcnow() - timedelta(days=random.randint(0, 25)) if random.random() > 0.5 else None,
+        email_rows = []
+        for user, trigger, status in zip(
+            random.choices(created_users, k=50),
+            random.choices(triggers, k=50),
+            random.choices(statuses, k=50),
+            strict=True,
+        ):
+            email_rows.append(
+                {
+                    "user_id": user.id,
+                    "trigger": trigger,
+                    "to_email": user.email,
+                    "subject": "Email subject",
+                    "status": status,
+                    "opened_at": datetime.utcnow() - timedelta(days=random.randint(0, 25))
+                    if random.random() > 0.5
+                    else None,
+                }
             )
-            db.add(email_log)
+        await db.execute(insert(EmailLog), email_rows)
 
-        await db.commit()
         print("  Created 50 email logs")
 
         print("\nCreating webhook endpoints...")
@@ -236,12 +281,17 @@ async def seed_data():
             {"name": "Zapier", "url": "https://zapier.com/hooks/catch/123"},
         ]
 
+        existing_webhooks = {
+            webhook.url: webhook
+            for webhook in await db.scalars(
+                select(WebhookEndpoint).where(WebhookEndpoint.url.in_([w["url"] for w in webhooks_data]))
+            )
+        }
+
         created_webhooks = []
         for w in webhooks_data:
-            existing = await db.execute(select(WebhookEndpoint).where(WebhookEndpoint.url == w["url"]))
-            if existing.scalar_one_or_none():
-                result = await db.execute(select(WebhookEndpoint).where(WebhookEndpoint.url == w["url"]))
-                created_webhooks.append(result.scalar_one())
+            if w["url"] in existing_webhooks:
+                created_webhooks.append(existing_webhooks[w["url"]])
                 continue
             webhook = WebhookEndpoint(
                 name=w["name"],
@@ -251,30 +301,34 @@ async def seed_data():
                 is_active=True,
             )
             db.add(webhook)
-            await db.flush()
             created_webhooks.append(webhook)
 
-        await db.commit()
+        await db.flush()
         print("  Created webhook endpoints")
 
         print("\nCreating webhook logs...")
         if created_webhooks:
-            for _ in range(30):
-                webhook = random.choice(created_webhooks)
+            webhook_log_rows = []
+            for webhook, event in zip(
+                random.choices(created_webhooks, k=30),
+                random.choices(["user.registered", "training.completed"], k=30),
+                strict=True,
+            ):
                 success = random.random() > 0.15  # 85% success rate
 
-                log = WebhookLog(
-                    endpoint_id=webhook.id,
-                    event=random.choice(["user.registered", "training.completed"]),
-                    payload={"event": "data"},
-                    status="success" if success else "failed",
-                    response_code=200 if success else random.choice([500, 502, 504]),
-                    response_body="OK" if success else "Error",
-                    attempts=1,
+                webhook_log_rows.append(
+                    {
+                        "endpoint_id": webhook.id,
+                        "event": event,
+                        "payload": {"event": "data"},
+                        "status": "success" if success else "failed",
+                        "response_code": 200 if success else random.choice([500, 502, 504]),
+                        "response_body": "OK" if success else "Error",
+                        "attempts": 1,
+                    }
                 )
-                db.add(log)
+            await db.execute(insert(WebhookLog), webhook_log_rows)
 
-        await db.commit()
         print("  Created 30 webhook logs")
 
         print("\nCreating admin alerts...")
@@ -323,7 +377,6 @@ async def seed_data():
             )
             db.add(alert)
 
-        await db.commit()
         print("  Created 5 admin alerts")
 
         print("\nCreating user journeys...")
@@ -337,20 +390,16 @@ async def seed_data():
             "power_user",
         ]
 
+        journey_rows = []
         for user in created_users:
             # Create journey progression for each user
             num_stages = random.randint(1, len(stages))
-            prev_stage = None
             for i in range(num_stages):
-                journey = UserJourney(
-                    user_id=user.id,
-                    stage=stages[i],
-                    previous_stage=prev_stage,
+                journey_rows.append(
+                    {"user_id": user.id, "stage": stages[i], "previous_stage": stages[i - 1] if i else None}
                 )
-                db.add(journey)
-                prev_stage = stages[i]
+        await db.execute(insert(UserJourney), journey_rows)
 
-        await db.commit()
         print("  Created user journeys")
 
         print("\n" + "=" * 50)
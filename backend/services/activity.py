@@ -3,19 +3,156 @@ Activity tracking service for user analytics.
 Tracks user actions, journey progression, and error logging.
 """
 
+import asyncio
 from datetime import datetime, timedelta
 
-from sqlalchemy import and_, func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+from sqlalchemy import and_, bindparam, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from database import AsyncSessionLocal
 from models import ActivityAction, ActivityLog, ErrorLog, JourneyStage, TrainingSession, User, UserJourney
 
+_STAGE_VALUES = tuple(stage.value for stage in JourneyStage)
+
+# (current stage, action) -> next stage
+_PROGRESSION = {
+    (JourneyStage.REGISTERED.value, ActivityAction.LOGIN.value): JourneyStage.FIRST_LOGIN.value,
+    (JourneyStage.FIRST_LOGIN.value, ActivityAction.UPLOAD_VIDEO.value): JourneyStage.FIRST_UPLOAD.value,
+    (JourneyStage.FIRST_UPLOAD.value, ActivityAction.COMPLETE_ANALYSIS.value): JourneyStage.FIRST_ANALYSIS.value,
+    (JourneyStage.FIRST_ANALYSIS.value, ActivityAction.COMPLETE_TRAINING.value): JourneyStage.FIRST_TRAINING.value,
+}
+
+# current stage -> (completed sessions required, next stage), checked on COMPLETE_TRAINING
+_SESSION_PROGRESSION = {
+    JourneyStage.FIRST_TRAINING.value: (3, JourneyStage.ACTIVE_USER.value),
+    JourneyStage.ACTIVE_USER.value: (10, JourneyStage.POWER_USER.value),
+}
+
+# Actions that can move a user to the next journey stage
+PROGRESSION_ACTIONS = frozenset(action for _, action in _PROGRESSION)
+
+logger = structlog.get_logger(__name__)
+
+
+async def _touch_users(
+    db: AsyncSession, activity: dict[int, datetime], logins: dict[int, tuple[int, datetime]]
+) -> None:
+    """Write last activity and login bookkeeping, one batched UPDATE per kind."""
+    users = User.__table__
+    if activity:
+        await db.execute(
+            update(users).where(users.c.id == bindparam("uid")).values(last_activity_at=bindparam("at")),
+            [{"uid": uid, "at": at} for uid, at in activity.items()],
+        )
+    if logins:
+        await db.execute(
+            update(users)
+            .where(users.c.id == bindparam("uid"))
+            .values(
+                last_login_at=bindparam("at"),
+                login_count=func.coalesce(users.c.login_count, 0) + bindparam("n"),
+            ),
+            [{"uid": uid, "n": n, "at": at} for uid, (n, at) in logins.items()],
+        )
+
+
+class ActivityTouchBuffer:
+    """
+    Coalesces users.last_activity_at / login bookkeeping writes.
+
+    log_activity() records touches in memory; a background worker writes them
+    through ``session_factory`` every ``flush_interval`` seconds (or as soon as
+    ``max_pending`` users are waiting), so a busy user costs one row write per
+    interval instead of one per request. Whoever owns the buffer must close()
+    it before exiting, or the pending touches are lost.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        flush_interval: float = 5.0,
+        max_pending: int = 500,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._activity: dict[int, datetime] = {}
+        self._logins: dict[int, tuple[int, datetime]] = {}
+        self._wake: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+
+    def touch(self, user_id: int, at: datetime, is_login: bool = False) -> None:
+        """Record activity (and optionally a login) for a user."""
+        self._activity[user_id] = at
+        if is_login:
+            count, _ = self._logins.get(user_id, (0, at))
+            self._logins[user_id] = (count + 1, at)
+
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        if len(self._activity) >= self.max_pending:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        """Write all pending touches in one transaction."""
+        if not self._activity and not self._logins:
+            return
+
+        activity, self._activity = self._activity, {}
+        logins, self._logins = self._logins, {}
+
+        try:
+            async with self.session_factory() as db, db.begin():
+                await _touch_users(db, activity, logins)
+        except Exception as e:
+            logger.error("activity_flush_failed", error=str(e), users=len(activity))
+            # Keep the touches for the next attempt, newer ones win
+            for uid, at in activity.items():
+                self._activity.setdefault(uid, at)
+            for uid, (n, at) in logins.items():
+                count, latest = self._logins.get(uid, (0, at))
+                self._logins[uid] = (count + n, latest)
+
+    async def close(self) -> None:
+        """Stop the background worker and write what is left."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        """Flush on every interval (or early when full) until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+
+# Application-wide buffer on the app engine, closed by the API lifespan
+activity_buffer = ActivityTouchBuffer()
+
 
 class ActivityService:
-    """Service for tracking and analyzing user activities."""
+    """
+    Service for tracking and analyzing user activities.
+
+    Pass ``touch_buffer`` (the API passes activity_buffer) to coalesce user
+    activity writes; without it they go through ``db`` with the activity log.
+    """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, touch_buffer: ActivityTouchBuffer | None = None):
         self.db = db
+        self.touch_buffer = touch_buffer
 
     # =========================================================================
     # ACTIVITY LOGGING
@@ -32,30 +169,34 @@ class ActivityService:
         user_agent: str | None = None,
     ) -> ActivityLog:
         """Log a user activity."""
-        activity = ActivityLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            extra_data=extra_data,
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
-        self.db.add(activity)
+        values = {
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "extra_data": extra_data,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+        }
 
-        # Update user's last_activity_at
-        result = await self.db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        if user:
-            user.last_activity_at = datetime.utcnow()
+        # Core insert: no ORM unit of work for a write-only log row. The generated
+        # columns come back on the same statement instead of a refresh.
+        activity_table = ActivityLog.__table__
+        result = await self.db.execute(
+            insert(activity_table).values(**values).returning(activity_table.c.id, activity_table.c.created_at)
+        )
+        row = result.one()
+        activity = ActivityLog(id=row.id, created_at=row.created_at, **values)
 
-            # Handle login tracking
-            if action == ActivityAction.LOGIN.value:
-                user.last_login_at = datetime.utcnow()
-                user.login_count = (user.login_count or 0) + 1
+        now = datetime.utcnow()
+        is_login = action == ActivityAction.LOGIN.value
+        if self.touch_buffer is not None:
+            # last_activity_at and login tracking are written in batches by the buffer
+            self.touch_buffer.touch(user_id, now, is_login=is_login)
+        else:
+            await _touch_users(self.db, {user_id: now}, {user_id: (1, now)} if is_login else {})
 
         await self.db.commit()
-        await self.db.refresh(activity)
 
         # Check for journey progression
         await self._check_journey_progression(user_id, action, resource_type)
@@ -89,42 +230,24 @@ class ActivityService:
 
     async def _check_journey_progression(self, user_id: int, action: str, resource_type: str | None = None):
         """Check if user should progress to next journey stage."""
+        if action not in PROGRESSION_ACTIONS:
+            return
+
         result = await self.db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
         if not user:
             return
 
         current_stage = user.journey_stage
-        new_stage = None
-
-        # Determine if stage should progress
-        if current_stage == JourneyStage.REGISTERED.value:
-            if action == ActivityAction.LOGIN.value:
-                new_stage = JourneyStage.FIRST_LOGIN.value
-
-        elif current_stage == JourneyStage.FIRST_LOGIN.value:
-            if action == ActivityAction.UPLOAD_VIDEO.value:
-                new_stage = JourneyStage.FIRST_UPLOAD.value
-
-        elif current_stage == JourneyStage.FIRST_UPLOAD.value:
-            if action == ActivityAction.COMPLETE_ANALYSIS.value:
-                new_stage = JourneyStage.FIRST_ANALYSIS.value
+        new_stage = _PROGRESSION.get((current_stage, action))
 
-        elif current_stage == JourneyStage.FIRST_ANALYSIS.value:
-            if action == ActivityAction.COMPLETE_TRAINING.value:
-                new_stage = JourneyStage.FIRST_TRAINING.value
-
-        elif current_stage == JourneyStage.FIRST_TRAINING.value:
-            # Check if user has 3+ completed sessions
-            sessions_count = await self._count_completed_sessions(user_id)
-            if sessions_count >= 3:
-                new_stage = JourneyStage.ACTIVE_USER.value
-
-        elif current_stage == JourneyStage.ACTIVE_USER.value:
-            # Check if user has 10+ completed sessions
-            sessions_count = await self._count_completed_sessions(user_id)
-            if sessions_count >= 10:
-                new_stage = JourneyStage.POWER_USER.value
+        # Active/power user promotion depends on the completed session count
+        if new_stage is None and action == ActivityAction.COMPLETE_TRAINING.value:
+            threshold = _SESSION_PROGRESSION.get(current_stage)
+            if threshold:
+                min_sessions, next_stage = threshold
+                if await self._count_completed_sessions(user_id) >= min_sessions:
+                    new_stage = next_stage
 
         if new_stage and new_stage != current_stage:
             await self.update_journey_stage(user_id, new_stage)
@@ -159,19 +282,19 @@ class ActivityService:
             user_id=user_id, stage=new_stage, previous_stage=previous_stage, extra_data=extra_data
         )
         self.db.add(journey_event)
+        # id and created_at come back from the INSERT's RETURNING, no refresh needed
         await self.db.commit()
-        await self.db.refresh(journey_event)
 
         return journey_event
 
     async def get_funnel_stats(self) -> dict:
         """Get funnel conversion statistics."""
-        stages = [stage.value for stage in JourneyStage]
-        stats = {}
+        stats = dict.fromkeys(_STAGE_VALUES, 0)
 
-        for stage in stages:
-            result = await self.db.execute(select(func.count(User.id)).where(User.journey_stage == stage))
-            stats[stage] = result.scalar() or 0
+        result = await self.db.execute(select(User.journey_stage, func.count(User.id)).group_by(User.journey_stage))
+        for stage, count in result.all():
+            if stage in stats:
+                stats[stage] = count
 
         # Calculate total and conversion rates
         total_users = sum(stats.values())
@@ -180,7 +303,7 @@ class ActivityService:
 
         conversion_rates = {}
         prev_count = total_users
-        for stage in stages:
+        for stage in _STAGE_VALUES:
             if prev_count > 0:
                 rate = (stats[stage] / prev_count) * 100
             else:
@@ -213,8 +336,8 @@ class ActivityService:
             request_data=request_data,
         )
         self.db.add(error)
+        # id and created_at come back from the INSERT's RETURNING, no refresh needed
         await self.db.commit()
-        await self.db.refresh(error)
         return error
 
     async def get_errors(
@@ -254,38 +377,32 @@ class ActivityService:
         error.resolved_by = admin_id
         error.resolution_notes = resolution_notes
 
+        # The loaded error already holds every value written here
         await self.db.commit()
-        await self.db.refresh(error)
         return error
 
     async def get_error_stats(self, days: int = 7) -> dict:
         """Get error statistics for the past N days."""
         since = datetime.utcnow() - timedelta(days=days)
 
-        # Total errors
-        total_result = await self.db.execute(select(func.count(ErrorLog.id)).where(ErrorLog.created_at >= since))
-        total = total_result.scalar() or 0
-
-        # Unresolved errors
-        unresolved_result = await self.db.execute(
-            select(func.count(ErrorLog.id)).where(
-                and_(
-                    ErrorLog.created_at >= since,
-                    ErrorLog.is_resolved == False,  # noqa: E712
-                )
-            )
-        )
-        unresolved = unresolved_result.scalar() or 0
-
-        # Errors by type
-        type_result = await self.db.execute(
-            select(ErrorLog.error_type, func.count(ErrorLog.id))
+        # One pass: counts per (type, resolved), totals are summed here
+        result = await self.db.execute(
+            select(ErrorLog.error_type, ErrorLog.is_resolved, func.count(ErrorLog.id))
             .where(ErrorLog.created_at >= since)
-            .group_by(ErrorLog.error_type)
-            .order_by(func.count(ErrorLog.id).desc())
-            .limit(10)
+            .group_by(ErrorLog.error_type, ErrorLog.is_resolved)
         )
-        by_type = {row[0]: row[1] for row in type_result.all()}
+
+        total = 0
+        unresolved = 0
+        type_counts: dict[str, int] = {}
+        for error_type, is_resolved, count in result.all():
+            total += count
+            if not is_resolved:
+                unresolved += count
+            type_counts[error_type] = type_counts.get(error_type, 0) + count
+
+        # Top 10 error types
+        by_type = dict(sorted(type_counts.items(), key=lambda item: item[1], reverse=True)[:10])
 
         return {
             "total": total,
@@ -361,20 +478,20 @@ class ActivityService:
         """Mark users as churned if inactive for X days."""
         threshold = datetime.utcnow() - timedelta(days=inactive_days)
 
-        result = await self.db.execute(
-            select(User).where(
-                and_(
-                    User.is_active == True,  # noqa: E712
-                    User.last_activity_at < threshold,
-                    User.journey_stage != JourneyStage.CHURNED.value,
-                )
-            )
+        inactive = and_(
+            User.is_active == True,  # noqa: E712
+            User.last_activity_at < threshold,
+            User.journey_stage != JourneyStage.CHURNED.value,
         )
-        users = result.scalars().all()
 
-        count = 0
-        for user in users:
-            await self.update_journey_stage(user.id, JourneyStage.CHURNED.value)
-            count += 1
+        # Log the transitions first, while journey_stage still holds the previous stage
+        await self.db.execute(
+            insert(UserJourney).from_select(
+                ["user_id", "stage", "previous_stage"],
+                select(User.id, literal(JourneyStage.CHURNED.value), User.journey_stage).where(inactive),
+            )
+        )
+        result = await self.db.execute(update(User).where(inactive).values(journey_stage=JourneyStage.CHURNED.value))
+        await self.db.commit()
 
-        return count
+        return result.rowcount
@@ -7,6 +7,7 @@ Responsable de:
 - Generation de feedback sur la confiance
 """
 
+import asyncio
 import re
 from dataclasses import dataclass, field
 
@@ -78,18 +79,29 @@ class AudioAnalyzer:
         "bon",
     ]
 
-    # Patterns de repetition
-    REPETITION_PATTERN = re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE)
+    # Tous les mots d'hesitation en une seule alternance (les plus longs d'abord)
+    HESITATION_PATTERN = re.compile(
+        r"\b(?:" + "|".join(map(re.escape, sorted(HESITATION_WORDS, key=len, reverse=True))) + r")\b",
+        re.IGNORECASE,
+    )
+
+    # Duree analysee au maximum par analyze_prosody (secondes)
+    MAX_ANALYSIS_SECONDS = 10
+
+    # Mots du transcript (pour detecter les repetitions sans backreference)
+    WORD_PATTERN = re.compile(r"\w+")
 
     def __init__(self):
         logger.info("audio_analyzer_initialized", librosa_available=LIBROSA_AVAILABLE)
 
-    async def analyze_prosody(self, audio_data: bytes, sample_rate: int = 16000) -> ProsodyAnalysis:
+    async def analyze_prosody(self, audio_data: "bytes | np.ndarray", sample_rate: int = 16000) -> ProsodyAnalysis:
         """
         Analyse la prosodie d'un segment audio.
 
+        Seules les MAX_ANALYSIS_SECONDS premieres secondes sont analysees.
+
         Args:
-            audio_data: Donnees audio en bytes
+            audio_data: Donnees audio float32, en bytes ou deja en tableau numpy
             sample_rate: Frequence d'echantillonnage
 
         Returns:
@@ -99,23 +111,37 @@ class AudioAnalyzer:
             logger.warning("prosody_analysis_skipped", reason="librosa not available")
             return ProsodyAnalysis()
 
+        # librosa/numpy work is CPU-bound: keep it off the event loop
+        return await asyncio.to_thread(self._analyze_prosody_sync, audio_data, sample_rate)
+
+    def _analyze_prosody_sync(self, audio_data: "bytes | np.ndarray", sample_rate: int) -> ProsodyAnalysis:
+        """Partie calcul de analyze_prosody, executee dans un thread."""
         try:
             import numpy as np
 
-            # Convert bytes to numpy array
-            audio = np.frombuffer(audio_data, dtype=np.float32)
+            # Use arrays as-is (no copy if already contiguous float32), decode bytes otherwise
+            if isinstance(audio_data, np.ndarray):
+                audio = np.ascontiguousarray(audio_data, dtype=np.float32)
+            else:
+                audio = np.frombuffer(audio_data, dtype=np.float32)
+
+            # Bounded cost: the first seconds are enough to classify pitch, pace and volume
+            max_samples = self.MAX_ANALYSIS_SECONDS * sample_rate
+            if audio.size > max_samples:
+                audio = audio[:max_samples]
+
+            # One STFT shared by pitch tracking and onset detection
+            spectrogram = np.abs(librosa.stft(audio))
 
             # Extract pitch (F0)
-            pitches, magnitudes = librosa.piptrack(y=audio, sr=sample_rate)
-            pitch_values = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if pitch > 0:
-                    pitch_values.append(pitch)
+            pitches, magnitudes = librosa.piptrack(S=spectrogram, sr=sample_rate)
+            # Pitch of the strongest bin in each frame, all frames at once
+            max_index = magnitudes.argmax(axis=0)
+            frame_pitches = pitches[max_index, np.arange(pitches.shape[1])]
+            pitch_values = frame_pitches[frame_pitches > 0]
 
-            pitch_mean = np.mean(pitch_values) if pitch_values else 0.0
-            pitch_std = np.std(pitch_values) if pitch_values else 0.0
+            pitch_mean = pitch_values.mean() if pitch_values.size else 0.0
+            pitch_std = pitch_values.std() if pitch_values.size else 0.0
 
             # Classify pitch variation
             if pitch_std < 20:
@@ -126,7 +152,8 @@ class AudioAnalyzer:
                 pitch_variation = "erratic"
 
             # Tempo estimation (based on onset detection)
-            onset_env = librosa.onset.onset_strength(y=audio, sr=sample_rate)
+            mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=spectrogram**2, sr=sample_rate))
+            onset_env = librosa.onset.onset_strength(S=mel_db, sr=sample_rate)
             tempo = librosa.beat.tempo(onset_envelope=onset_env, sr=sample_rate)[0]
 
             # Classify pace
@@ -176,13 +203,12 @@ class AudioAnalyzer:
             EmotionAnalysis avec les emotions detectees
         """
         prosody = prosody or ProsodyAnalysis()
-        transcript_lower = transcript.lower()
 
         # Count hesitation words
-        hesitation_count = sum(1 for word in self.HESITATION_WORDS if word in transcript_lower)
+        hesitation_count = self.count_hesitations(transcript)
 
         # Count repetitions
-        repetitions = len(self.REPETITION_PATTERN.findall(transcript))
+        repetitions = self.count_repetitions(transcript)
 
         # Calculate word count for normalization
         word_count = len(transcript.split())
@@ -291,5 +317,31 @@ class AudioAnalyzer:
         Returns:
             Nombre d'hesitations
         """
-        transcript_lower = transcript.lower()
-        return sum(1 for word in self.HESITATION_WORDS if word in transcript_lower)
+        return len({match.lower() for match in self.HESITATION_PATTERN.findall(transcript)})
+
+    def count_repetitions(self, transcript: str) -> int:
+        """
+        Compte les mots repetes immediatement ("oui oui", "je je").
+
+        Balayage lineaire des mots: deux mots consecutifs identiques (sans
+        tenir compte de la casse) separes uniquement par des espaces comptent
+        pour une repetition, sans chevauchement.
+
+        Args:
+            transcript: Texte a analyser
+
+        Returns:
+            Nombre de repetitions
+        """
+        repetitions = 0
+        previous_word = None
+        previous_end = 0
+        for match in self.WORD_PATTERN.finditer(transcript):
+            word = match.group().lower()
+            if word == previous_word and transcript[previous_end : match.start()].isspace():
+                repetitions += 1
+                previous_word = None
+                continue
+            previous_word = word
+            previous_end = match.end()
+        return repetitions
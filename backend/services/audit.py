@@ -9,12 +9,16 @@ from typing import Any
 import structlog
 from fastapi import Request
 from sqlalchemy import func, select
+from sqlalchemy import inspect as sqla_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import AdminAuditLog, User
 
 logger = structlog.get_logger()
 
+# Sensitive fields never written to the audit trail
+_SKIP = frozenset({"hashed_password", "password"})
+
 
 class AuditService:
     """Service for logging admin actions."""
@@ -66,8 +70,8 @@ class AuditService:
         )
 
         self.db.add(audit_log)
+        # id and created_at come back from the INSERT's RETURNING, no refresh needed
         await self.db.commit()
-        await self.db.refresh(audit_log)
 
         logger.info(
             "admin_audit_logged", admin_id=admin.id, action=action, resource_type=resource_type, resource_id=resource_id
@@ -92,27 +96,29 @@ class AuditService:
         per_page = min(per_page, 100)
         skip = (page - 1) * per_page
 
-        query = select(AdminAuditLog)
-        count_query = select(func.count(AdminAuditLog.id))
-
+        filters = []
         if admin_id:
-            query = query.where(AdminAuditLog.admin_id == admin_id)
-            count_query = count_query.where(AdminAuditLog.admin_id == admin_id)
-
+            filters.append(AdminAuditLog.admin_id == admin_id)
         if action:
-            query = query.where(AdminAuditLog.action == action)
-            count_query = count_query.where(AdminAuditLog.action == action)
-
+            filters.append(AdminAuditLog.action == action)
         if resource_type:
-            query = query.where(AdminAuditLog.resource_type == resource_type)
-            count_query = count_query.where(AdminAuditLog.resource_type == resource_type)
-
-        total = await self.db.scalar(count_query)
-
-        result = await self.db.execute(query.order_by(AdminAuditLog.created_at.desc()).offset(skip).limit(per_page))
-        logs = result.scalars().all()
+            filters.append(AdminAuditLog.resource_type == resource_type)
+
+        # Page and total count in one round trip
+        result = await self.db.execute(
+            select(AdminAuditLog, func.count().over().label("total"))
+            .where(*filters)
+            .order_by(AdminAuditLog.created_at.desc(), AdminAuditLog.id.desc())
+            .offset(skip)
+            .limit(per_page)
+        )
+        rows = result.all()
+        if rows:
+            return [row.AdminAuditLog for row in rows], rows[0].total
 
-        return list(logs), total or 0
+        # Past the last page there is no row to carry the window count
+        total = await self.db.scalar(select(func.count(AdminAuditLog.id)).where(*filters)) if skip else 0
+        return [], total or 0
 
     async def get_log(self, log_id: int) -> AdminAuditLog | None:
         """Get a specific audit log entry."""
@@ -128,22 +134,19 @@ def serialize_for_audit(obj: Any) -> dict:
     if obj is None:
         return None
 
-    if hasattr(obj, "__dict__"):
-        # SQLAlchemy model
+    state = sqla_inspect(obj, raiseerr=False)
+    if state is not None:
+        # SQLAlchemy model: mapped columns only, so relationships and
+        # instance state never show up and nothing gets lazy-loaded
+        unloaded = state.unloaded
         result = {}
-        for key, value in vars(obj).items():
-            if key.startswith("_"):
-                continue
-            # Skip sensitive fields
-            if key in ("hashed_password", "password"):
-                continue
-            # Convert datetime to ISO string
-            if hasattr(value, "isoformat"):
-                value = value.isoformat()
-            # Skip relationships
-            if hasattr(value, "__tablename__"):
+        for attr in state.mapper.column_attrs:
+            key = attr.key
+            if key in _SKIP or key in unloaded:
                 continue
-            result[key] = value
+            # Datetimes are left as is, the engine's orjson serializer
+            # writes them as ISO strings
+            result[key] = getattr(obj, key)
         return result
 
     return obj
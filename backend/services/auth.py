@@ -21,6 +21,19 @@ from config import get_settings
 settings = get_settings()
 logger = structlog.get_logger()
 
+# Password policy character classes, compiled once
+_UPPERCASE_RE = re.compile(r"[A-Z]")
+_LOWERCASE_RE = re.compile(r"[a-z]")
+_DIGIT_RE = re.compile(r"\d")
+_SPECIAL_RE = re.compile(r'[!@#$%^&*()_+\-=\[\]{}|;\':",./<>?]')
+
+# Token settings, resolved once at import
+_REFRESH_SECRET = settings.REFRESH_TOKEN_SECRET or (settings.JWT_SECRET + "_refresh")
+_JWT_ALG = settings.JWT_ALGORITHM
+_JWT_ALGS = [_JWT_ALG]
+_ACCESS_EXPIRE = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_EXPIRE = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
 
 # ============================================
 # Password Functions
@@ -45,16 +58,16 @@ def validate_password(password: str) -> tuple[bool, str]:
     if len(password) < settings.PASSWORD_MIN_LENGTH:
         return False, f"Password must be at least {settings.PASSWORD_MIN_LENGTH} characters"
 
-    if not re.search(r"[A-Z]", password):
+    if not _UPPERCASE_RE.search(password):
         return False, "Password must contain at least one uppercase letter (A-Z)"
 
-    if not re.search(r"[a-z]", password):
+    if not _LOWERCASE_RE.search(password):
         return False, "Password must contain at least one lowercase letter (a-z)"
 
-    if not re.search(r"\d", password):
+    if not _DIGIT_RE.search(password):
         return False, "Password must contain at least one digit (0-9)"
 
-    if not re.search(r'[!@#$%^&*()_+\-=\[\]{}|;\':",./<>?]', password):
+    if not _SPECIAL_RE.search(password):
         return False, "Password must contain at least one special character (!@#$%^&*...)"
 
     return True, ""
@@ -63,7 +76,7 @@ def validate_password(password: str) -> tuple[bool, str]:
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     password_bytes = password.encode("utf-8")[:72]  # bcrypt limit
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode("utf-8")
 
@@ -82,9 +95,9 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def create_access_token(user_id: int, email: str) -> str:
     """Create a JWT access token."""
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    payload = {"sub": str(user_id), "email": email, "type": "access", "exp": expire, "iat": datetime.utcnow()}
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    now = datetime.utcnow()
+    payload = {"sub": str(user_id), "email": email, "type": "access", "exp": now + _ACCESS_EXPIRE, "iat": now}
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=_JWT_ALG)
 
 
 def create_refresh_token(user_id: int, email: str) -> tuple[str, str, datetime]:
@@ -92,24 +105,21 @@ def create_refresh_token(user_id: int, email: str) -> tuple[str, str, datetime]:
     Create a refresh token.
     Returns: (token, token_hash, expires_at)
     """
-    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    now = datetime.utcnow()
+    expires_at = now + _REFRESH_EXPIRE
     token_id = secrets.token_urlsafe(32)
 
-    refresh_secret = settings.REFRESH_TOKEN_SECRET or (settings.JWT_SECRET + "_refresh")
-
     payload = {
         "sub": str(user_id),
         "email": email,
         "type": "refresh",
         "jti": token_id,
         "exp": expires_at,
-        "iat": datetime.utcnow(),
+        "iat": now,
     }
 
-    token = jwt.encode(payload, refresh_secret, algorithm=settings.JWT_ALGORITHM)
-    token_hash = hashlib.sha256(token.encode()).hexdigest()
-
-    return token, token_hash, expires_at
+    token = jwt.encode(payload, _REFRESH_SECRET, algorithm=_JWT_ALG)
+    return token, hash_refresh_token(token), expires_at
 
 
 def verify_refresh_token(token: str) -> dict:
@@ -117,8 +127,7 @@ def verify_refresh_token(token: str) -> dict:
     Verify a refresh token and return its payload.
     Raises JWTError if invalid.
     """
-    refresh_secret = settings.REFRESH_TOKEN_SECRET or (settings.JWT_SECRET + "_refresh")
-    payload = jwt.decode(token, refresh_secret, algorithms=[settings.JWT_ALGORITHM])
+    payload = jwt.decode(token, _REFRESH_SECRET, algorithms=_JWT_ALGS)
 
     if payload.get("type") != "refresh":
         raise JWTError("Invalid token type")
@@ -136,4 +145,4 @@ def decode_access_token(token: str) -> dict:
     Decode and verify an access token.
     Raises JWTError if invalid.
     """
-    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=_JWT_ALGS)
@@ -15,7 +15,7 @@ import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from database import get_db
+from database import get_db, json_deserializer, json_serializer
 from main import app
 from models import Base, User
 from services.auth import create_access_token, hash_password
@@ -39,7 +39,13 @@ def event_loop() -> Generator:
 @pytest_asyncio.fixture(scope="function")
 async def db_engine():
     """Create a fresh database engine for each test."""
-    engine = create_async_engine(TEST_DATABASE_URL, echo=False, future=True)
+    engine = create_async_engine(
+        TEST_DATABASE_URL,
+        echo=False,
+        future=True,
+        json_serializer=json_serializer,
+        json_deserializer=json_deserializer,
+    )
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -6,8 +6,12 @@ Tests full request/response cycle:
 - Champion endpoints (list, upload without auth)
 """
 
+from unittest.mock import AsyncMock, patch
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import User
 
@@ -62,6 +66,22 @@ class TestAuthRegister:
         data = response.json()
         assert "Conflict" in str(data)
 
+    @pytest.mark.asyncio
+    async def test_register_commit_failure_is_not_reported_as_success(
+        self, client: AsyncClient, db_session: AsyncSession, valid_user_data: dict
+    ):
+        """A failing commit should fail the request instead of answering 200."""
+        error = IntegrityError("INSERT INTO users", {}, Exception("UNIQUE constraint failed: users.email"))
+
+        # No handler maps IntegrityError, so the test transport re-raises it
+        with (
+            patch.object(db_session, "commit", AsyncMock(side_effect=error)) as commit,
+            pytest.raises(IntegrityError),
+        ):
+            await client.post("/auth/register", json=valid_user_data)
+
+        commit.assert_awaited_once()
+
 
 class TestAuthLogin:
     """Tests for /auth/login endpoint."""
@@ -152,11 +152,10 @@ class TestCryptographicFailures:
     async def test_expired_token_rejected(self, client: AsyncClient, test_user: User):
         """Expired JWT tokens should be rejected."""
         # Create an expired token
-        with patch("services.auth.timedelta") as mock_timedelta:
-            # Force token to be created with past expiry
-            from datetime import timedelta
+        from datetime import timedelta
 
-            mock_timedelta.return_value = timedelta(minutes=-30)
+        # Force token to be created with past expiry
+        with patch("services.auth._ACCESS_EXPIRE", timedelta(minutes=-30)):
             expired_token = create_access_token(test_user.id, test_user.email)
 
         headers = {"Authorization": f"Bearer {expired_token}"}
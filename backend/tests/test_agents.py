@@ -12,6 +12,24 @@ os.environ["ANTHROPIC_API_KEY"] = "test-key"
 os.environ["OPENAI_API_KEY"] = "test-key"
 
 
+class _MockStream:
+    """Minimal stand-in for the Anthropic ``messages.stream`` context manager."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
 class TestBaseAgent:
     """Tests for BaseAgent class."""
 
@@ -94,35 +112,336 @@ class TestOrchestrator:
         # This would need agents loaded, skip full test
         assert orch.decision_engine is not None
 
+    @pytest.mark.asyncio
+    async def test_execute_workflow_respects_dependencies(self, mock_decision_engine):
+        """Test steps start once their dependencies complete, by priority."""
+        from orchestrator import ChampionCloneOrchestrator
+        from orchestrator.decision_engine import AgentType, Workflow, WorkflowStep
+
+        started = []
+
+        async def run(task, context):
+            started.append(task)
+            return {"status": "success", "task": task, "seen": sorted(context["previous_results"])}
+
+        agent = MagicMock(run=run)
+        orch = ChampionCloneOrchestrator()
+        orch.agents = {AgentType.AUDIO: agent, AgentType.PATTERN: agent, AgentType.TRAINING: agent}
+
+        workflow = Workflow(
+            id="wf_test",
+            steps=[
+                WorkflowStep(agent=AgentType.AUDIO, task="transcribe", priority=2),
+                WorkflowStep(agent=AgentType.PATTERN, task="analyze", depends_on=["step_0"]),
+                WorkflowStep(agent=AgentType.TRAINING, task="warmup", priority=1),
+            ],
+            reasoning="Test",
+        )
+        result = await orch.execute_workflow(workflow, "req1")
+
+        assert result["status"] == "completed"
+        assert started == ["warmup", "transcribe", "analyze"]
+        assert "step_0" in result["results"]["step_1"]["seen"]
+        mock_decision_engine.return_value.should_continue.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stream_workflow_yields_step_events(self, mock_decision_engine):
+        """Test each step result is streamed before the final summary."""
+        from orchestrator import ChampionCloneOrchestrator
+        from orchestrator.decision_engine import AgentType, Workflow, WorkflowStep
+
+        agent = MagicMock(run=AsyncMock(return_value={"status": "success"}))
+        orch = ChampionCloneOrchestrator()
+        orch.agents = {AgentType.AUDIO: agent, AgentType.PATTERN: agent}
+
+        workflow = Workflow(
+            id="wf_test",
+            steps=[
+                WorkflowStep(agent=AgentType.AUDIO, task="transcribe"),
+                WorkflowStep(agent=AgentType.PATTERN, task="analyze", depends_on=["step_0"]),
+            ],
+            reasoning="Test",
+        )
+        events = [event async for event in orch.stream_workflow(workflow, "req1")]
+
+        assert [(e["type"], e.get("step_id")) for e in events] == [
+            ("step_complete", "step_0"),
+            ("step_complete", "step_1"),
+            ("done", None),
+        ]
+        assert events[-1]["result"]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_execute_step_timeout(self, mock_decision_engine):
+        """Test a step exceeding its timeout is reported as a step error."""
+        import asyncio
+
+        from orchestrator import ChampionCloneOrchestrator
+        from orchestrator.decision_engine import AgentType, Workflow, WorkflowStep
+
+        async def run(task, context):
+            await asyncio.sleep(1)
+
+        orch = ChampionCloneOrchestrator()
+        orch.agents = {AgentType.AUDIO: MagicMock(run=run)}
+
+        workflow = Workflow(
+            id="wf_test",
+            steps=[WorkflowStep(agent=AgentType.AUDIO, task="transcribe", timeout_seconds=0.01)],
+            reasoning="Test",
+        )
+        result = await orch.execute_workflow(workflow, "req1")
+
+        assert result["status"] == "completed_with_errors"
+        assert "timed out" in result["results"]["step_0"]["error"]
+
+    @pytest.mark.asyncio
+    async def test_cancel_workflow_stops_running_steps(self, mock_decision_engine):
+        """Test cancelling a workflow cancels in-flight steps and skips queued ones."""
+        import asyncio
+
+        from orchestrator import ChampionCloneOrchestrator
+        from orchestrator.decision_engine import AgentType, Workflow, WorkflowStep
+
+        started = asyncio.Event()
+        interrupted = []
+        calls = []
+
+        async def run(task, context):
+            calls.append(task)
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                interrupted.append(task)
+                raise
+
+        orch = ChampionCloneOrchestrator()
+        orch.agents = {AgentType.AUDIO: MagicMock(run=run), AgentType.PATTERN: MagicMock(run=run)}
+
+        workflow = Workflow(
+            id="wf_test",
+            steps=[
+                WorkflowStep(agent=AgentType.AUDIO, task="transcribe"),
+                WorkflowStep(agent=AgentType.PATTERN, task="analyze", depends_on=["step_0"]),
+            ],
+            reasoning="Test",
+        )
+        execution = asyncio.create_task(orch.execute_workflow(workflow, "req1"))
+        await started.wait()
+
+        assert await orch.cancel_workflow("req1") is True
+        result = await asyncio.wait_for(execution, timeout=1)
+
+        assert result["status"] == "cancelled"
+        assert interrupted == ["transcribe"]
+        assert calls == ["transcribe"]
+
+    @pytest.mark.asyncio
+    async def test_stream_workflow_early_stop_awaits_running_steps(self, mock_decision_engine):
+        """Test steps abandoned by an early stop have unwound before "done" is yielded."""
+        import asyncio
+
+        from orchestrator import ChampionCloneOrchestrator
+        from orchestrator.decision_engine import AgentType, Workflow, WorkflowStep
+
+        unwound = []
+
+        async def fail(task, context):
+            raise RuntimeError("agent down")
+
+        async def slow(task, context):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0)  # cleanup that spans a loop iteration
+                unwound.append(task)
+                raise
+
+        orch = ChampionCloneOrchestrator()
+        orch.agents = {AgentType.AUDIO: MagicMock(run=fail), AgentType.PATTERN: MagicMock(run=slow)}
+        orch.decision_engine.should_continue = AsyncMock(return_value=(False, "step failed"))
+
+        workflow = Workflow(
+            id="wf_test",
+            steps=[
+                WorkflowStep(agent=AgentType.AUDIO, task="transcribe"),
+                WorkflowStep(agent=AgentType.PATTERN, task="analyze"),
+            ],
+            reasoning="Test",
+        )
+        async for event in orch.stream_workflow(workflow, "req1"):
+            if event["type"] == "done":
+                unwound_at_done = list(unwound)
+                status = event["result"]["status"]
+
+        assert unwound_at_done == ["analyze"]
+        assert status == "completed_with_errors"
+
+    def test_tracked_workflows_are_bounded(self, mock_decision_engine):
+        """Test finished workflow records are evicted by age and count, running ones are kept."""
+        from datetime import datetime, timedelta
+
+        from orchestrator import ChampionCloneOrchestrator
+        from orchestrator.main import WorkflowExecution
+
+        def record(request_id, started_at, status="completed"):
+            return WorkflowExecution(workflow_id="wf", request_id=request_id, status=status, started_at=started_at)
+
+        orch = ChampionCloneOrchestrator()
+        orch.MAX_TRACKED_WORKFLOWS = 2
+
+        expired = datetime.utcnow() - timedelta(seconds=orch.WORKFLOW_TTL_SECONDS + 1)
+        orch._track_workflow("old", record("old", expired))
+        orch._track_workflow("a", record("a", datetime.utcnow()))
+        assert list(orch.active_workflows) == ["a"]
+
+        orch._track_workflow("b", record("b", datetime.utcnow()))
+        orch._track_workflow("c", record("c", datetime.utcnow()))
+        assert list(orch.active_workflows) == ["b", "c"]
+
+        # Still running: neither the TTL nor the cap drops it
+        orch.active_workflows.clear()
+        orch._track_workflow("slow", record("slow", expired, status="running"))
+        orch._track_workflow("d", record("d", datetime.utcnow()))
+        orch._track_workflow("e", record("e", datetime.utcnow()))
+        assert list(orch.active_workflows) == ["slow", "e"]
+
 
 class TestDecisionEngine:
     """Tests for DecisionEngine routing."""
 
     @pytest.fixture
     def mock_anthropic(self):
-        with patch("orchestrator.decision_engine.AsyncAnthropic") as mock:
+        with (
+            patch("orchestrator.decision_engine._client", None),
+            patch("orchestrator.decision_engine.AsyncAnthropic") as mock,
+        ):
             yield mock
 
     @pytest.mark.asyncio
     async def test_analyze_returns_workflow(self, mock_anthropic):
         """Test decision engine creates workflow."""
-        mock_response = MagicMock()
-        mock_response.content = [
-            MagicMock(
-                text='{"reasoning": "Test", "workflow": [{"agent": "audio", "task": "Extract"}], "parallel_groups": [[0]]}'
+        mock_anthropic.return_value.messages.stream = MagicMock(
+            return_value=_MockStream(
+                [
+                    '{"reasoning": "Test", "workflow": ',
+                    '[{"agent": "audio", "task": "Extract"}], "parallel_groups": [[0]]}',
+                ]
             )
-        ]
-        mock_anthropic.return_value.messages.create = AsyncMock(return_value=mock_response)
+        )
 
         from orchestrator.decision_engine import DecisionEngine
 
         engine = DecisionEngine()
         workflow = await engine.analyze("Upload video")
 
-        assert workflow.id is not None
+        assert workflow.id == "wf_fc74a0a7d7ac"  # stable across processes
         assert len(workflow.steps) == 1
         assert workflow.steps[0].task == "Extract"
 
+    @pytest.mark.asyncio
+    async def test_abatch_returns_workflows_in_order(self, mock_anthropic):
+        """Test batched analysis maps results back to their tasks."""
+
+        def _entry(custom_id, text):
+            entry = MagicMock(custom_id=custom_id)
+            entry.result.type = "succeeded"
+            entry.result.message.content = [MagicMock(text=text)]
+            return entry
+
+        async def _results(_batch_id):
+            async def _iter():
+                # Results are not guaranteed to come back in request order
+                yield _entry("task_1", '{"reasoning": "B", "workflow": [{"agent": "pattern", "task": "Analyze"}]}')
+                yield _entry("task_0", '{"reasoning": "A", "workflow": [{"agent": "audio", "task": "Extract"}]}')
+
+            return _iter()
+
+        batches = mock_anthropic.return_value.messages.batches
+        batches.create = AsyncMock(return_value=MagicMock(id="batch_1", processing_status="ended"))
+        batches.results = _results
+
+        from orchestrator.decision_engine import AgentType, DecisionEngine
+
+        engine = DecisionEngine()
+        workflows = await engine.abatch([("Upload video", None), ("Find patterns", {"champion_id": 1})])
+
+        assert [wf.steps[0].agent for wf in workflows] == [AgentType.AUDIO, AgentType.PATTERN]
+        assert batches.create.call_args.kwargs["requests"][1]["custom_id"] == "task_1"
+
+    @pytest.mark.asyncio
+    async def test_abatch_cancels_batch_after_max_wait(self, mock_anthropic):
+        """Test a batch that never ends is cancelled and every task falls back."""
+        batches = mock_anthropic.return_value.messages.batches
+        in_progress = MagicMock(id="batch_1", processing_status="in_progress")
+        batches.create = AsyncMock(return_value=in_progress)
+        batches.retrieve = AsyncMock(return_value=in_progress)
+        batches.cancel = AsyncMock()
+
+        from orchestrator.decision_engine import DecisionEngine
+
+        engine = DecisionEngine()
+        engine.BATCH_POLL_INTERVAL_SECONDS = 0.001
+        engine.BATCH_MAX_WAIT_SECONDS = 0.01
+        workflows = await engine.abatch([("Upload video", None), ("Find patterns", None)])
+
+        batches.cancel.assert_awaited_once_with("batch_1")
+        assert [wf.id for wf in workflows] == ["wf_fallback", "wf_fallback"]
+
+    @pytest.mark.asyncio
+    async def test_abatch_falls_back_when_prompt_build_fails(self, mock_anthropic):
+        """Test an error building a prompt returns fallbacks instead of raising."""
+        from orchestrator.decision_engine import DecisionEngine
+
+        engine = DecisionEngine()
+        with patch.object(engine, "_build_prompt", side_effect=ValueError("bad context")):
+            workflows = await engine.abatch([("Upload video", None)])
+
+        assert [wf.id for wf in workflows] == ["wf_fallback"]
+        mock_anthropic.return_value.messages.batches.create.assert_not_called()
+
+    def test_parse_workflow_strips_code_fences(self, mock_anthropic):
+        """Test fenced JSON responses are parsed instead of falling back."""
+        from orchestrator.decision_engine import DecisionEngine
+
+        engine = DecisionEngine()
+        body = '{"reasoning": "Test", "workflow": [{"agent": "pattern", "task": "Analyze"}]}'
+
+        for response_text in (
+            body,
+            f"```json\n{body}\n```",
+            f"  ```JSON {body}```\nDone.",
+            f"```\n{body}\n```",
+            f"```json\n{body}\n",
+        ):
+            workflow = engine._parse_workflow("Find patterns", response_text)
+            assert workflow.id != "wf_fallback"
+            assert workflow.steps[0].task == "Analyze"
+
+    def test_engines_share_client(self, mock_anthropic):
+        """Test all engines reuse one Anthropic client."""
+        from orchestrator.decision_engine import DecisionEngine
+
+        assert DecisionEngine().client is DecisionEngine().client
+        assert mock_anthropic.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_close_client_creates_fresh_client_on_next_use(self, mock_anthropic):
+        """Test closing the shared client makes existing engines pick up a new one."""
+        from orchestrator.decision_engine import DecisionEngine, close_client
+
+        engine = DecisionEngine()
+        first = engine.client
+        first.close = AsyncMock()
+
+        await close_client()
+
+        first.close.assert_awaited_once()
+        mock_anthropic.return_value = MagicMock()
+        assert engine.client is not first
+        assert mock_anthropic.call_count == 2
+
     def test_fallback_workflow(self, mock_anthropic):
         """Test fallback workflow creation."""
         from orchestrator.decision_engine import AgentType, DecisionEngine
@@ -134,6 +453,11 @@ class TestDecisionEngine:
         assert len(workflow.steps) == 1
         assert workflow.steps[0].agent == AgentType.AUDIO
 
+        # Audio keywords take precedence over pattern keywords
+        assert engine._create_fallback_workflow("Analyse cette vidéo").steps[0].agent == AgentType.AUDIO
+        assert engine._create_fallback_workflow("Extract techniques").steps[0].agent == AgentType.PATTERN
+        assert engine._create_fallback_workflow("Start a session").steps[0].agent == AgentType.TRAINING
+
     def test_get_next_steps(self, mock_anthropic):
         """Test getting next executable steps."""
         from orchestrator.decision_engine import AgentType, DecisionEngine, Workflow, WorkflowStep
@@ -156,6 +480,14 @@ class TestDecisionEngine:
         next_steps = engine.get_next_steps(workflow, {0})
         assert next_steps == [1]
 
+    def test_step_dependencies_resolved_once(self):
+        """Test depends_on is parsed into step indices at construction."""
+        from orchestrator.decision_engine import AgentType, WorkflowStep
+
+        step = WorkflowStep(agent=AgentType.PATTERN, task="Analyze", depends_on=["step_0", "step_2", "transcript"])
+
+        assert step.resolved_deps == [0, 2]
+
 
 class TestMemory:
     """Tests for memory systems."""
@@ -141,6 +141,19 @@ class TestAudioAnalyzer:
         count = analyzer.count_hesitations(transcript)
         assert count == 0
 
+    def test_count_hesitations_whole_words_only(self, analyzer):
+        """Les mots d'hesitation a l'interieur d'autres mots ne comptent pas."""
+        transcript = "Bonjour, voici le cahier des charges."
+
+        count = analyzer.count_hesitations(transcript)
+        assert count == 0
+
+    def test_count_repetitions(self, analyzer):
+        """Repetitions immediates, sans chevauchement et insensibles a la casse."""
+        assert analyzer.count_repetitions("On peut peut faire ca, oui Oui.") == 2
+        assert analyzer.count_repetitions("oui oui oui") == 1
+        assert analyzer.count_repetitions("oui, oui") == 0
+
     def test_count_hesitations_case_insensitive(self, analyzer):
         """Detection insensible a la casse."""
         transcript = "EUH donc VOILA je pense"
@@ -0,0 +1,37 @@
+"""
+Unit Tests for the content import script.
+
+Tests:
+- Skills import is idempotent when content files use numeric ids
+"""
+
+import orjson
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Skill
+from scripts.import_content import import_skills
+
+
+class TestImportSkills:
+    """Tests for import_skills."""
+
+    @pytest.mark.asyncio
+    async def test_reimport_skips_existing_numeric_ids(self, db_session: AsyncSession, tmp_path):
+        """A second run should skip skills whose numeric id is already stored as a slug."""
+        skills = [
+            {"id": 1, "slug": "preparation_ciblage", "name": "Préparation", "level": "beginner"},
+            {"id": 2, "slug": "script_accroche", "name": "Accroche", "level": "beginner"},
+        ]
+        (tmp_path / "skills.json").write_bytes(orjson.dumps({"skills": skills}))
+
+        # Called directly: run_importer would swallow a UNIQUE violation and return 0
+        first = await import_skills(db_session, tmp_path)
+        second = await import_skills(db_session, tmp_path)
+
+        assert first == 2
+        assert second == 0
+        slugs = set(await db_session.scalars(select(Skill.slug)))
+        assert slugs == {"1", "2"}
+        assert await db_session.scalar(select(func.count(Skill.id))) == 2
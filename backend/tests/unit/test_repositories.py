@@ -9,7 +9,7 @@ Tests repository layer functions:
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import Champion, User
+from models import Champion, TrainingSession, User
 from repositories import ChampionRepository, UserRepository
 from services.auth import hash_password
 
@@ -160,6 +160,20 @@ class TestChampionRepository:
         assert len(ready_champions) == 1
         assert ready_champions[0].name == "Ready"
 
+    @pytest.mark.asyncio
+    async def test_get_all_ordered_with_sessions(self, db_session: AsyncSession):
+        """Should preload training sessions so they can be read without lazy loading."""
+        repo = ChampionRepository(db_session)
+
+        champion = await repo.create(Champion(name="With sessions", status="ready"))
+        db_session.add(TrainingSession(champion_id=champion.id, user_id="user1", messages=[]))
+        await db_session.flush()
+        db_session.expunge_all()
+
+        champions = await repo.get_all_ordered(with_sessions=True)
+
+        assert len(champions[0].sessions) == 1
+
     @pytest.mark.asyncio
     async def test_delete_champion(self, db_session: AsyncSession):
         """Should delete a champion."""